@@ -3,20 +3,62 @@ Enhanced Trade Executor with Real-Time Price Validation and KuCoin Order Fixes
 """
 
 import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import socket
+import sys
+import textwrap
 import time
-import uuid
-from typing import Dict, List, Any, Optional
+import websockets
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from datetime import datetime
+from dataclasses import dataclass
+from decimal import Decimal
 
 from models.arbitrage_opportunity import ArbitrageOpportunity, TradeStep, OpportunityStatus
 from models.trade_log import TradeLog, TradeStepLog, TradeStatus, TradeDirection
 from utils.logger import setup_logger
 from utils.trade_logger import get_trade_logger
+from utils.rate_limiter import TokenBucket
 from config.config import Config
 
+# Trade ids: host tag + process-local sequence (no urandom read per trade)
+_HOST8 = hashlib.blake2b(socket.gethostname().encode(), digest_size=4).hexdigest()
+_TRADE_SEQ = itertools.count()
+
+_RULE = "=" * 60
+_CONFIRMATION_BANNER = textwrap.dedent(f"""
+    {_RULE}
+    🔴 LIVE TRADE CONFIRMATION
+    {_RULE}
+    Exchange: {{exchange}}
+    Triangle: {{path}}
+    Trade Amount: ${{amount:.2f}}
+    Expected Profit: {{profit_pct:.4f}}% (${{profit_amount:.2f}})
+    ⚠️ WARNING: This will execute REAL trades with REAL money!
+    {_RULE}
+""")
+
+@dataclass
+class StepPlan:
+    """Precomputed execution plan for a single triangle leg."""
+    quantity_fn: Callable[[float], float]  # maps amount carried from previous leg to order quantity
+    received_key: str  # order result field holding the amount carried to the next leg
+    spend_currency: str
+    receive_currency: str
+
 class TradeExecutor:
     """Enhanced trade executor with real-time price validation and proper order tracking."""
     
+    # Legs 2-3 of a batched triangle are sized slightly under the expected fill
+    BATCH_SAFETY_MARGIN = 0.995
+    
+    # Binance best bid/ask stream feeding the in-memory ticker cache
+    BOOK_TICKER_URL = "wss://stream.binance.com:9443/ws/!bookTicker"
+    TICKER_MAX_AGE = 1.0  # seconds before falling back to REST
+    
     def __init__(self, exchange_manager, config: Dict[str, Any]):
         self.exchange_manager = exchange_manager
         self.config = config
@@ -29,16 +71,38 @@ class TradeExecutor:
         self.paper_trading = False  # ALWAYS LIVE TRADING
         self.enable_manual_confirmation = config.get('enable_manual_confirmation', False)
         self.min_profit_threshold = config.get('min_profit_threshold', 0.3)
+        self.max_trade_amount = config.get('max_trade_amount', Config.MAX_TRADE_AMOUNT)  # per-trade USDT cap
         
         # Order tracking
         self.active_orders = {}
         self.completed_trades = []
         
+        # Best bid/ask cache: raw symbol (BTCUSDT) -> (bid, ask, received_at)
+        self._ticker_cache: Dict[str, Tuple[float, float, float]] = {}
+        self._bookticker_task: Optional[asyncio.Task] = None
+        
+        # Pace order placement locally instead of eating exchange 429 backoffs
+        self._order_rate_limiter = TokenBucket(
+            rate=config.get('order_rate_per_second', 10),
+            capacity=config.get('order_burst', 20)
+        )
+        
+        # Trade logs are persisted/broadcast off the execution path
+        # (queue and writer task are created on first use, inside the running event loop)
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_drain_task: Optional[asyncio.Task] = None
+        
         self.logger.info(f"🔴 LIVE TradeExecutor initialized")
         self.logger.info(f"   Auto Trading: {self.auto_trading}")
         self.logger.info(f"   Paper Trading: {self.paper_trading}")
         self.logger.info(f"   Min Profit Threshold: 0.4% (FIXED)")
         self.logger.info(f"   LIGHTNING MODE: Zero WebSocket overhead")
+        
+        # Guard against regressing to per-request HTTP sessions (new TCP+TLS per order)
+        for exchange_id, exchange in getattr(exchange_manager, 'exchanges', {}).items():
+            session = getattr(exchange, '_session', None)
+            if session is None or session.closed:
+                self.logger.warning(f"⚠️ {exchange_id} has no pooled keep-alive HTTP session")
     
     def set_websocket_manager(self, websocket_manager):
         """Set WebSocket manager for real-time updates."""
@@ -48,6 +112,10 @@ class TradeExecutor:
     
     async def execute_arbitrage(self, opportunity: ArbitrageOpportunity) -> bool:
         """Execute triangular arbitrage with enhanced real-time price validation."""
+        # FAST PATH: reject before any logging, WebSocket toggling or TradeLog allocation
+        if not self._should_execute(opportunity):
+            return False
+        
         try:
             # INSTANT MODE: Complete WebSocket shutdown during execution
             self.logger.info("🚀 INSTANT MODE: Disabling WebSocket for maximum speed")
@@ -64,6 +132,10 @@ class TradeExecutor:
             # Re-enable WebSocket after execution
             await self._re_enable_websocket_after_execution()
     
+    def _should_execute(self, opportunity: ArbitrageOpportunity) -> bool:
+        """Cheap synchronous pre-check against the configured profit threshold and trade size."""
+        return opportunity.profit_percentage >= self.min_profit_threshold and opportunity.initial_amount > 0
+    
     async def _disable_websocket_during_execution(self):
         """Disable WebSocket during trade execution for maximum speed"""
         try:
@@ -181,8 +253,13 @@ class TradeExecutor:
             
             self.logger.info(f"✅ All trading pairs validated for {exchange_name}: {pair1}, {pair2 if pair2 in available_pairs else alt_pair2}, {pair3}")
             
-            # SPEED OPTIMIZATION: Use cached tickers if available (under 5 seconds old)
-            if hasattr(exchange, '_last_tickers_cache') and hasattr(exchange, '_last_cache_time'):
+            # SPEED OPTIMIZATION: Use streamed best bid/ask when fresh, else cached tickers (under 5 seconds old)
+            if exchange_name == 'binance':
+                self._start_bookticker_stream()
+            tickers = self._get_streamed_tickers([pair1, pair2, alt_pair2, pair3])
+            if pair1 in tickers and pair3 in tickers and (pair2 in tickers or alt_pair2 in tickers):
+                self.logger.info("⚡ SPEED: Using WebSocket best bid/ask")
+            elif hasattr(exchange, '_last_tickers_cache') and hasattr(exchange, '_last_cache_time'):
                 cache_age = time.time() - exchange._last_cache_time
                 if cache_age < 5:  # Use cache if under 5 seconds old
                     tickers = exchange._last_tickers_cache
@@ -227,7 +304,7 @@ class TradeExecutor:
                 return False
             
             # Calculate REALISTIC triangle with FRESH prices
-            start_amount = min(20.0, opportunity.initial_amount)  # Use opportunity amount
+            start_amount = min(self.max_trade_amount, opportunity.initial_amount)  # Use opportunity amount
             
             # Step 1: USDT → intermediate (buy intermediate with USDT)
             price1 = float(t1['ask'])  # Buy at ask price
@@ -312,6 +389,39 @@ class TradeExecutor:
             self.logger.error(f"❌ Validation error: {e}")
             return False
     
+    def _start_bookticker_stream(self) -> None:
+        """Start the background best bid/ask stream if it is not already running."""
+        if self._bookticker_task is None or self._bookticker_task.done():
+            self._bookticker_task = asyncio.create_task(self._run_bookticker_ws(), name='bookticker')
+    
+    async def _run_bookticker_ws(self) -> None:
+        """Keep the ticker cache fed from Binance's all-symbol bookTicker stream."""
+        while True:
+            try:
+                async with websockets.connect(self.BOOK_TICKER_URL) as websocket:
+                    self.logger.info("✅ Book ticker stream connected")
+                    async for message in websocket:
+                        data = json.loads(message)
+                        bid, ask = data.get('b'), data.get('a')
+                        if bid and ask:
+                            self._ticker_cache[data['s']] = (float(bid), float(ask), time.time())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Book ticker stream error: {e}")
+                await asyncio.sleep(1)
+    
+    def _get_streamed_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        """Return ccxt-style tickers for symbols with a fresh streamed best bid/ask."""
+        tickers = {}
+        now = time.time()
+        for symbol in symbols:
+            cached = self._ticker_cache.get(symbol.replace('/', ''))
+            if cached and now - cached[2] <= self.TICKER_MAX_AGE:
+                bid, ask, _ = cached
+                tickers[symbol] = {'bid': bid, 'ask': ask, 'last': (bid + ask) / 2}
+        return tickers
+    
     def _get_valid_currencies_for_exchange(self, exchange_name: str) -> set:
         """Get valid currencies for specific exchange"""
         if exchange_name == 'kucoin':
@@ -333,35 +443,40 @@ class TradeExecutor:
     
     async def _execute_triangle_trade(self, opportunity: ArbitrageOpportunity) -> bool:
         """Execute the complete triangular arbitrage trade with enhanced error handling."""
-        trade_id = f"trade_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}"
-        start_time = time.time()
+        # One monotonic anchor for durations, one wall-clock read for ids and timestamps
+        t0_ns = time.perf_counter_ns()
+        wall_start = datetime.now()
+        trade_id = f"trade_{int(wall_start.timestamp() * 1000)}_{_HOST8}{next(_TRADE_SEQ):04x}"
         
         try:
-            exchange_name = getattr(opportunity, 'exchange', 'unknown')
+            exchange_name = getattr(opportunity, 'exchange', None)
+            if not exchange_name and hasattr(self.exchange_manager, 'first_available'):
+                exchange_name = self.exchange_manager.first_available()
             exchange = self.exchange_manager.get_exchange(exchange_name)
             
             if not exchange:
                 self.logger.error(f"❌ Exchange {exchange_name} not available")
                 return False
             
-            self.logger.info(f"⚡ LIGHTNING: {exchange_name} {opportunity.triangle_path}")
+            self.logger.info("⚡ LIGHTNING: %s %s", exchange_name, opportunity.triangle_path)
             
             # Log trade attempt
             await self._log_trade_attempt(opportunity, trade_id)
             
             # Execute triangle steps with enhanced error handling
-            return await self._execute_triangle_steps(opportunity, exchange, trade_id, start_time)
+            return await self._execute_triangle_steps(opportunity, exchange, trade_id, t0_ns, wall_start)
             
         except Exception as e:
             self.logger.error(f"❌ Critical error in triangle trade: {e}")
-            await self._log_trade_failure(opportunity, trade_id, str(e), start_time)
+            await self._log_trade_failure(opportunity, trade_id, str(e), t0_ns, wall_start)
             return False
     
-    async def _execute_triangle_steps(self, opportunity: ArbitrageOpportunity, exchange, trade_id: str, start_time: float) -> bool:
+    async def _execute_triangle_steps(self, opportunity: ArbitrageOpportunity, exchange, trade_id: str,
+                                      t0_ns: int, wall_start: datetime) -> bool:
         """Execute all three steps with ULTRA-FAST timing and CORRECT amounts."""
         try:
             # CRITICAL FIX: Use configured trade amount, not opportunity amount
-            configured_trade_amount = min(20.0, opportunity.initial_amount)  # ENFORCE $20 maximum
+            configured_trade_amount = min(self.max_trade_amount, opportunity.initial_amount)  # ENFORCE configured maximum
             
             # INSTANT: Pre-sync time before execution
             if exchange.exchange_id == 'kucoin':
@@ -372,9 +487,6 @@ class TradeExecutor:
                 if hasattr(exchange.exchange, 'options'):
                     exchange.exchange.options['timeDifference'] = 1000  # 1-second buffer
             
-            # CRITICAL FIX: Track ACTUAL asset amounts (not USD values) through the triangle
-            actual_amounts = {}
-            
             # Parse triangle path to get currencies
             triangle_path = getattr(opportunity, 'triangle_path', '')
             if isinstance(triangle_path, str):
@@ -389,130 +501,175 @@ class TradeExecutor:
                 self.logger.error(f"❌ Triangle path is not string: {type(triangle_path)}")
                 return False
             
-            self.logger.info(f"🔧 FIXED EXECUTION: {base_currency} → {intermediate_currency} → {quote_currency} → {base_currency}")
+            self.logger.info("🔧 FIXED EXECUTION: %s → %s → %s → %s", base_currency, intermediate_currency, quote_currency, base_currency)
             
-            for step_num, step in enumerate(opportunity.steps, 1):
-                try:
-                    step_start = time.time()
-                    
-                    # CRITICAL FIX: Use CORRECT asset amounts from previous steps
-                    if step_num == 1:
-                        # Step 1: Buy intermediate currency with USDT
-                        real_quantity = configured_trade_amount  # $20 USDT to spend
-                        self.logger.info(f"🔧 Step 1: Spending {real_quantity:.2f} USDT to buy {intermediate_currency}")
-                    elif step_num == 2:
-                        # Step 2: Use ACTUAL intermediate currency amount from step 1
-                        real_quantity = actual_amounts.get('step1_filled', 0)
+            # Triangle topology is fixed before execution - plan every leg up front
+            plans = self._plan_triangle(opportunity, configured_trade_amount,
+                                        base_currency, intermediate_currency, quote_currency)
+            step_logs: List[Optional[TradeStepLog]] = [None] * len(opportunity.steps)
+            
+            if self._use_batch_orders(exchange):
+                # Submit all three legs in one request using expected leg amounts
+                final_balance = await self._execute_batch_legs(exchange, opportunity, plans,
+                                                               configured_trade_amount, step_logs)
+                if final_balance is None:
+                    return False
+            else:
+                carried_amount = 0.0
+                
+                for step_num, (step, plan) in enumerate(zip(opportunity.steps, plans), 1):
+                    try:
+                        step_start_ns = time.perf_counter_ns()
+                        
+                        # CRITICAL FIX: Use CORRECT asset amounts from previous steps
+                        real_quantity = plan.quantity_fn(carried_amount)
                         if real_quantity <= 0:
-                            self.logger.error(f"❌ No {intermediate_currency} received from step 1")
+                            self.logger.error("❌ Invalid quantity for step %d: %s %s", step_num, real_quantity, plan.spend_currency)
                             return False
-                        self.logger.info(f"🔧 Step 2: Selling {real_quantity:.8f} {intermediate_currency} for {quote_currency}")
-                    elif step_num == 3:
-                        # Step 3: Use ACTUAL quote currency amount from step 2 (CRITICAL FIX)
-                        real_quantity = actual_amounts.get('step2_received', 0)
-                        if real_quantity <= 0:
-                            self.logger.error(f"❌ No {quote_currency} received from step 2")
+                        
+                        self.logger.info("🔧 Step %d: %s %.8f %s → %s", step_num, step.side.upper(), real_quantity, plan.spend_currency, plan.receive_currency)
+                        
+                        # Execute the order with actual amount
+                        order_result = await self._execute_lightning_step(exchange, step.symbol, step.side, real_quantity, step_num)
+                        
+                        if not order_result or not order_result.get('success'):
+                            self.logger.error("❌ Step %d failed: %s", step_num, order_result.get('error', 'Unknown error'))
                             return False
-                        self.logger.info(f"🔧 Step 3: Selling {real_quantity:.8f} {quote_currency} for USDT")
-                    else:
-                        self.logger.error(f"❌ Invalid step number: {step_num}")
-                        return False
-                    
-                    if real_quantity <= 0:
-                        self.logger.error(f"❌ Invalid quantity for step {step_num}: {real_quantity}")
-                        return False
-                    
-                    # Execute the order with actual amount
-                    order_result = await self._execute_lightning_step(exchange, step.symbol, step.side, real_quantity, step_num)
+                        
+                        # CRITICAL FIX: Carry the amount we actually received into the next step
+                        # For BUY orders 'filled' is what we received, for SELL orders 'cost' is
+                        carried_amount = float(order_result.get(plan.received_key, 0))
+                        self.logger.info("✅ Step %d: Received %.8f %s", step_num, carried_amount, plan.receive_currency)
+                        
+                        step_ms = (time.perf_counter_ns() - step_start_ns) / 1e6
+                        step_logs[step_num - 1] = self._build_step_log(step_num, step, real_quantity,
+                                                                       order_result, carried_amount, step_ms)
+                        self.logger.info("⚡ Step %d completed in %.0fms", step_num, step_ms)
                     
-                    if not order_result or not order_result.get('success'):
-                        self.logger.error(f"❌ Step {step_num} failed: {order_result.get('error', 'Unknown error')}")
+                    except Exception as e:
+                        self.logger.error("❌ Error in step %d: %s", step_num, e)
                         return False
-                    
-                    # CRITICAL FIX: Store CORRECT asset amounts for next step
-                    filled_quantity = float(order_result.get('filled', 0))
-                    cost = float(order_result.get('cost', 0))
-                    
-                    # CRITICAL FIX: Store CORRECT amounts based on order type and what we received
-                    if step_num == 1:
-                        # Step 1: We bought intermediate currency with USDT
-                        # For BUY orders: 'filled' = amount of intermediate currency we received
-                        actual_amounts['step1_filled'] = filled_quantity  # TWT amount received
-                        self.logger.info(f"✅ Step 1: Received {filled_quantity:.8f} {intermediate_currency}")
-                    elif step_num == 2:
-                        # Step 2: We sold intermediate for quote currency
-                        # For SELL orders: 'filled' = amount we sold, 'cost' = amount we received
-                        # CRITICAL: Use 'cost' for what we received, not 'filled'
-                        if step.side == 'sell':
-                            actual_amounts['step2_received'] = cost  # BTC amount received (in quote currency)
-                            self.logger.info(f"✅ Step 2: Sold {filled_quantity:.8f} {intermediate_currency}, received {cost:.8f} {quote_currency}")
-                        else:
-                            actual_amounts['step2_received'] = filled_quantity  # For buy orders
-                            self.logger.info(f"✅ Step 2: Bought {filled_quantity:.8f} {quote_currency}")
-                    elif step_num == 3:
-                        # Step 3: We sold quote currency for USDT
-                        # For SELL orders: 'cost' = USDT amount received
-                        actual_amounts['step3_usdt'] = cost  # USDT amount received
-                        self.logger.info(f"✅ Step 3: Sold {filled_quantity:.8f} {quote_currency}, received {cost:.2f} USDT")
-                    
-                    step_time = (time.time() - step_start) * 1000
-                    self.logger.info(f"⚡ Step {step_num} completed in {step_time:.0f}ms")
-                    
-                except Exception as e:
-                    self.logger.error(f"❌ Error in step {step_num}: {e}")
-                    return False
-            
-            # CRITICAL FIX: Use ACTUAL USDT received from step 3
-            final_balance = actual_amounts.get('step3_usdt', 0)
+                
+                # CRITICAL FIX: Use ACTUAL USDT received from step 3
+                final_balance = carried_amount
             
             if final_balance <= 0:
                 self.logger.error(f"❌ No USDT received from final step")
                 return False
             
             # Calculate ACTUAL profit using real amounts
-            actual_profit = final_balance - configured_trade_amount
-            actual_profit_pct = (actual_profit / configured_trade_amount) * 100
-            
-            total_execution_time = (time.time() - start_time) * 1000
-            
-            self.logger.info(f"🎉 EXECUTION COMPLETE:")
-            self.logger.info(f"   Initial: {configured_trade_amount:.2f} USDT")
-            self.logger.info(f"   Final: {final_balance:.2f} USDT")
-            self.logger.info(f"   Actual Profit: ${actual_profit:.4f} ({actual_profit_pct:.4f}%)")
-            self.logger.info(f"   Duration: {total_execution_time:.0f}ms")
+            # Exchange balances are fixed-point - subtract in Decimal so float drift can't flip the sign
+            trade_amount_dec = Decimal(str(configured_trade_amount))
+            profit_dec = Decimal(str(final_balance)) - trade_amount_dec
+            actual_profit = float(profit_dec)
+            actual_profit_pct = float(profit_dec / trade_amount_dec * 100)
+            
+            total_execution_time = (time.perf_counter_ns() - t0_ns) / 1e6
+            opportunity.execution_time = total_execution_time / 1000
+            
+            if self.logger.isEnabledFor(logging.INFO):
+                # One pre-joined record instead of a waterfall of single-line logs
+                self.logger.info(
+                    "🎉 EXECUTION COMPLETE:\n"
+                    "   Initial: %.2f USDT\n"
+                    "   Final: %.2f USDT\n"
+                    "   Actual Profit: $%.4f (%.4f%%)\n"
+                    "   Duration: %.0fms",
+                    configured_trade_amount, final_balance, actual_profit, actual_profit_pct, total_execution_time
+                )
             
             # Log successful trade
-            await self._log_trade_success(opportunity, trade_id, final_balance, start_time)
+            await self._log_trade_success(opportunity, trade_id, final_balance, t0_ns, wall_start, step_logs)
             
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Error in triangle steps execution: {e}")
-            await self._log_trade_failure(opportunity, trade_id, str(e), start_time)
+            await self._log_trade_failure(opportunity, trade_id, str(e), t0_ns, wall_start)
             return False
     
+    def _plan_triangle(self, opportunity: ArbitrageOpportunity, trade_amount: float,
+                       base_currency: str, intermediate_currency: str, quote_currency: str) -> List[StepPlan]:
+        """Build the per-leg execution plan once so the step loop needs no branching."""
+        step2_key = 'cost' if opportunity.steps[1].side == 'sell' else 'filled'
+        return [
+            # Step 1: Spend configured USDT to buy intermediate currency
+            StepPlan(lambda carried: trade_amount, 'filled', base_currency, intermediate_currency),
+            # Step 2: Trade ACTUAL intermediate amount received from step 1
+            StepPlan(lambda carried: carried, step2_key, intermediate_currency, quote_currency),
+            # Step 3: Sell ACTUAL quote amount received from step 2 for USDT
+            StepPlan(lambda carried: carried, 'cost', quote_currency, base_currency),
+        ]
+    
+    def _use_batch_orders(self, exchange) -> bool:
+        """Batch placement is opt-in since legs 2-3 are sized from expected, not actual, fills."""
+        return (self.config.get('batch_order_execution', False) and
+                hasattr(exchange, 'place_batch_market_orders') and
+                exchange.supports_batch_orders())
+    
+    async def _execute_batch_legs(self, exchange, opportunity: ArbitrageOpportunity,
+                                  plans: List[StepPlan], trade_amount: float,
+                                  step_logs: List[Optional[TradeStepLog]]) -> Optional[float]:
+        """Place all legs in one HTTP call and return the final amount received, or None on failure."""
+        # Scale expected leg amounts to the configured trade size, with headroom for slippage
+        scale = trade_amount / opportunity.initial_amount if opportunity.initial_amount > 0 else 0
+        orders = [(opportunity.steps[0].symbol, opportunity.steps[0].side, trade_amount)]
+        for step in opportunity.steps[1:3]:
+            orders.append((step.symbol, step.side, step.quantity * scale * self.BATCH_SAFETY_MARGIN))
+        
+        batch_start_ns = time.perf_counter_ns()
+        await self._order_rate_limiter.acquire(len(orders))
+        results = await exchange.place_batch_market_orders(orders)
+        batch_ms = (time.perf_counter_ns() - batch_start_ns) / 1e6
+        
+        for step_num, (result, plan, step, order) in enumerate(zip(results, plans, opportunity.steps, orders), 1):
+            if not result or not result.get('success'):
+                self.logger.error("❌ Step %d failed: %s", step_num, (result or {}).get('error', 'Unknown error'))
+                return None
+            received = float(result.get(plan.received_key, 0))
+            step_logs[step_num - 1] = self._build_step_log(step_num, step, order[2], result, received, batch_ms)
+            self.logger.info("✅ Step %d: Received %.8f %s", step_num, received, plan.receive_currency)
+        
+        self.logger.info("⚡ Batch of %d legs completed in %.0fms", len(orders), batch_ms)
+        return float(results[-1].get(plans[-1].received_key, 0))
+    
+    def _build_step_log(self, step_num: int, step: TradeStep, quantity: float,
+                        order_result: Dict[str, Any], received: float, execution_ms: float) -> TradeStepLog:
+        """Record expected vs actual figures for one executed leg."""
+        actual_price = float(order_result.get('average', 0) or 0)
+        fee_info = order_result.get('fee') or {}
+        slippage_pct = abs(actual_price - step.price) / step.price * 100 if step.price > 0 and actual_price > 0 else 0.0
+        return TradeStepLog(
+            step_number=step_num,
+            symbol=step.symbol,
+            direction=TradeDirection.BUY if step.side == 'buy' else TradeDirection.SELL,
+            expected_price=step.price,
+            actual_price=actual_price,
+            expected_quantity=step.quantity,
+            actual_quantity=quantity,
+            expected_amount_out=step.expected_amount,
+            actual_amount_out=received,
+            fees_paid=float(fee_info.get('cost', 0) or 0) if isinstance(fee_info, dict) else 0.0,
+            execution_time_ms=execution_ms,
+            slippage_percentage=slippage_pct
+        )
+    
     async def _execute_lightning_step(self, exchange, symbol: str, side: str, 
                                     quantity: float, step_num: int) -> Dict[str, Any]:
         """Execute single step with INSTANT timing - zero overhead."""
         try:
-            # INSTANT: Pre-sync time for KuCoin before order
-            if exchange.exchange_id == 'kucoin':
-                # Ensure timestamp is fresh
-                current_timestamp = int(time.time() * 1000) + 500  # 0.5-second buffer
-                
-                # Apply timestamp to exchange options
-                if hasattr(exchange.exchange, 'options'):
-                    exchange.exchange.options['timeDifference'] = 500
+            # INSTANT: 0.5-second timestamp buffer for KuCoin before order
+            if exchange.exchange_id == 'kucoin' and hasattr(exchange.exchange, 'options'):
+                exchange.exchange.options['timeDifference'] = 500
             
-            # INSTANT: Execute order immediately
+            # INSTANT: Execute order immediately - market orders need no pre-trade price lookup;
+            # expected prices for logging come from opportunity.steps
+            await self._order_rate_limiter.acquire()
             order_result = await exchange.place_market_order(symbol, side, quantity)
             
             if not order_result:
                 return {'success': False, 'error': 'No response from exchange'}
             
-            if not order_result.get('success'):
-                return order_result
-            
             # INSTANT: Return immediately
             return order_result
             
@@ -543,21 +700,47 @@ class TradeExecutor:
             except Exception as e:
                 self.logger.error(f"Error logging trade attempt: {e}")
     
+    async def _queue_trade_log(self, trade_log: TradeLog) -> None:
+        """Hand a trade log to the background writer without waiting on disk or WebSocket I/O."""
+        if self._log_drain_task is None or self._log_drain_task.done():
+            if self._log_queue is None:
+                self._log_queue = asyncio.Queue(maxsize=1024)
+            self._log_drain_task = asyncio.create_task(self._drain_trade_logs(), name='trade_log_drain')
+        try:
+            self._log_queue.put_nowait(trade_log)
+        except asyncio.QueueFull:
+            # Backpressure: only now does the caller wait for the writer
+            await self._log_queue.put(trade_log)
+    
+    async def _drain_trade_logs(self) -> None:
+        """Write queued trade logs one at a time."""
+        while True:
+            trade_log = await self._log_queue.get()
+            try:
+                await self.trade_logger.log_trade(trade_log)
+            except Exception as e:
+                self.logger.error(f"Error writing trade log {trade_log.trade_id}: {e}")
+            finally:
+                self._log_queue.task_done()
+    
     async def _log_trade_success(self, opportunity: ArbitrageOpportunity, trade_id: str, 
-                               final_amount: float, start_time: float):
+                               final_amount: float, t0_ns: int, wall_start: datetime,
+                               step_logs: Optional[List[Optional[TradeStepLog]]] = None):
         """Log successful trade completion."""
         if self.trade_logger:
             try:
-                execution_time = (time.time() - start_time) * 1000
-                actual_profit = final_amount - opportunity.initial_amount
-                actual_profit_pct = (actual_profit / opportunity.initial_amount) * 100
+                execution_time = (time.perf_counter_ns() - t0_ns) / 1e6
+                initial_dec = Decimal(str(opportunity.initial_amount))
+                profit_dec = Decimal(str(final_amount)) - initial_dec
+                actual_profit = float(profit_dec)
+                actual_profit_pct = float(profit_dec / initial_dec * 100)
                 
                 # Create detailed trade log
                 trade_log = TradeLog(
                     trade_id=trade_id,
-                    timestamp=datetime.now(),
+                    timestamp=wall_start,
                     exchange=getattr(opportunity, 'exchange', 'unknown'),
-                    triangle_path=opportunity.triangle_path.split(' → ')[:3],
+                    triangle_path=opportunity.triangle_path_list[:3],
                     status=TradeStatus.SUCCESS,
                     initial_amount=opportunity.initial_amount,
                     final_amount=final_amount,
@@ -572,17 +755,24 @@ class TradeExecutor:
                     total_duration_ms=execution_time
                 )
                 
-                await self.trade_logger.log_trade(trade_log)
+                executed_steps = [step_log for step_log in (step_logs or []) if step_log]
+                if executed_steps:
+                    trade_log.steps = executed_steps
+                    trade_log.total_fees_paid = float(sum(Decimal(str(step_log.fees_paid)) for step_log in executed_steps))
+                    trade_log.total_slippage = sum(step_log.slippage_percentage * step_log.expected_amount_out
+                                                   for step_log in executed_steps) / 100
+                
+                await self._queue_trade_log(trade_log)
                 
             except Exception as e:
                 self.logger.error(f"Error logging trade success: {e}")
     
     async def _log_trade_failure(self, opportunity: ArbitrageOpportunity, trade_id: str, 
-                               error_message: str, start_time: float):
+                               error_message: str, t0_ns: int, wall_start: datetime):
         """Log failed trade."""
         if self.trade_logger:
             try:
-                execution_time = (time.time() - start_time) * 1000
+                execution_time = (time.perf_counter_ns() - t0_ns) / 1e6
                 
                 trade_data = {
                     'triangle_path': opportunity.triangle_path,
@@ -605,9 +795,9 @@ class TradeExecutor:
                 # Create detailed failure log
                 trade_log = TradeLog(
                     trade_id=trade_id,
-                    timestamp=datetime.now(),
+                    timestamp=wall_start,
                     exchange=getattr(opportunity, 'exchange', 'unknown'),
-                    triangle_path=opportunity.triangle_path.split(' → ')[:3],
+                    triangle_path=opportunity.triangle_path_list[:3],
                     status=TradeStatus.FAILED,
                     initial_amount=opportunity.initial_amount,
                     final_amount=opportunity.initial_amount,  # No change on failure
@@ -623,31 +813,37 @@ class TradeExecutor:
                     error_message=error_message
                 )
                 
-                await self.trade_logger.log_trade(trade_log)
+                await self._queue_trade_log(trade_log)
                 
             except Exception as e:
                 self.logger.error(f"Error logging trade failure: {e}")
     
     async def _get_manual_confirmation(self, opportunity: ArbitrageOpportunity) -> bool:
         """Get manual confirmation for trade execution."""
+        # Steady state (auto trading / confirmation disabled): no banner, no lookups
+        if self.auto_trading or not self.enable_manual_confirmation:
+            return True
+        
         try:
-            print("\n" + "="*60)
-            print("🔴 LIVE TRADE CONFIRMATION")
-            print("="*60)
-            print(f"Exchange: {getattr(opportunity, 'exchange', 'Unknown')}")
-            print(f"Triangle: {opportunity.triangle_path}")
-            print(f"Trade Amount: ${opportunity.initial_amount:.2f}")
-            print(f"Expected Profit: {opportunity.profit_percentage:.4f}% (${opportunity.profit_amount:.2f})")
-            print("⚠️ WARNING: This will execute REAL trades with REAL money!")
-            print("="*60)
+            # One write for the whole banner so concurrent output can't interleave
+            sys.stdout.write(_CONFIRMATION_BANNER.format(
+                exchange=getattr(opportunity, 'exchange', 'Unknown'),
+                path=opportunity.triangle_path,
+                amount=opportunity.initial_amount,
+                profit_pct=opportunity.profit_percentage,
+                profit_amount=opportunity.profit_amount
+            ))
+            sys.stdout.flush()
             
             # In a real GUI, this would be a dialog box
-            # For now, we'll auto-approve if auto_trading is enabled
-            if self.auto_trading:
-                return True
-            
-            # For manual mode, require explicit confirmation
-            return False  # Would be replaced with actual user input in GUI
+            # For manual mode, require explicit confirmation from a terminal
+            if not sys.stdin or not sys.stdin.isatty():
+                return False  # No console attached (GUI/web) - never block on stdin
+            
+            # Read stdin in a worker thread so streams and the log writer keep running
+            loop = asyncio.get_running_loop()
+            response = (await loop.run_in_executor(None, input, "Execute this trade? (yes/no): ")).lower().strip()
+            return response in ('y', 'yes')
             
         except Exception as e:
             self.logger.error(f"Error getting manual confirmation: {e}")
@@ -1,8 +1,152 @@
+import asyncio
+import json
 import time
-from typing import List, Dict, Any, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple, FrozenSet, Optional
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from models.arbitrage_opportunity import ArbitrageOpportunity, TradeStep
 from exchanges.unified_exchange import UnifiedExchange
 from utils.logger import setup_logger
+from utils.prices import parse_price
+
+_COMMON_QUOTES = ('USDT', 'USDC', 'BTC', 'ETH', 'BNB')
+_INF = float('inf')
+
+@lru_cache(maxsize=2048)
+def _format_raw_symbol(symbol: str) -> str:
+    """Convert raw symbol (e.g., BTCUSDT) to normalized pair (BTC/USDT)."""
+    for quote in _COMMON_QUOTES:
+        if symbol.endswith(quote):
+            base = symbol[:-len(quote)]
+            return f"{base}/{quote}"
+    return symbol
+
+
+def _scan_kernel_numpy(tri_idx: np.ndarray, tri_sell: np.ndarray, prices: np.ndarray,
+                       min_ratio: np.ndarray) -> np.ndarray:
+    """Indices of triangles whose gross return reaches their own min_ratio entry.
+
+    A sell leg converts at the bid (x * bid), a buy leg at the ask (x / ask).
+    Prices are stored as float32; the return is accumulated in float64.
+    """
+    gross = np.ones(tri_idx.shape[0], dtype=np.float64)
+    priced = np.ones(tri_idx.shape[0], dtype=np.bool_)
+    for leg in range(3):
+        sell = tri_sell[:, leg]
+        price = np.where(sell, prices[tri_idx[:, leg], 0], prices[tri_idx[:, leg], 1]).astype(np.float64)
+        priced &= price > 0
+        rate = np.zeros_like(price)
+        np.divide(1.0, price, out=rate, where=~sell & (price > 0))
+        gross *= np.where(sell, price, rate)
+    return np.flatnonzero(priced & (gross >= min_ratio))
+
+
+if NUMBA_AVAILABLE:
+    # float32 prices halve memory traffic; the ratio itself is float64 since profits are tiny deltas around 1.0.
+    # nogil lets the websocket coroutines keep running while a scan is in the worker thread.
+    @njit(parallel=True, fastmath=True, cache=True, nogil=True)
+    def _scan_kernel(tri_idx, tri_sell, prices, min_ratio):
+        n = tri_idx.shape[0]
+        keep = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            gross = 1.0
+            for leg in range(3):
+                sell = tri_sell[i, leg]
+                price = np.float64(prices[tri_idx[i, leg], 0 if sell else 1])
+                if price <= 0:
+                    gross = 0.0
+                    break
+                gross = gross * price if sell else gross / price
+            if gross >= min_ratio[i]:
+                keep[i] = True
+        return np.nonzero(keep)[0]
+else:
+    _scan_kernel = _scan_kernel_numpy
+
+# Relaxations smaller than this are float noise, not arbitrage
+_BF_EPS = 1e-12
+
+
+def _bellman_ford_numpy(edge_u: np.ndarray, edge_v: np.ndarray, weights: np.ndarray,
+                        n_vertices: int) -> Tuple[np.ndarray, int]:
+    """Bellman-Ford from a virtual source joined to every currency at distance 0.
+
+    Edges are relaxed together each round. Returns the predecessor edge of every vertex
+    and a vertex still relaxing after |V| rounds (it leads back into a negative cycle),
+    or -1 when the graph has none.
+    """
+    dist = np.zeros(n_vertices, dtype=np.float64)
+    pred = np.full(n_vertices, -1, dtype=np.int64)
+    for _ in range(n_vertices):
+        cand = dist[edge_u] + weights
+        best = dist.copy()
+        np.minimum.at(best, edge_v, cand)
+        improved = np.flatnonzero((cand < dist[edge_v] - _BF_EPS) & (cand <= best[edge_v]))
+        if not len(improved):
+            return pred, -1
+        pred[edge_v[improved]] = improved
+        dist = best
+    return pred, int(edge_v[improved[-1]])
+
+
+if NUMBA_AVAILABLE:
+    # No fastmath: unpriced edges carry an infinite weight
+    @njit(cache=True, nogil=True)
+    def _bellman_ford_kernel(edge_u, edge_v, weights, n_vertices):
+        dist = np.zeros(n_vertices, dtype=np.float64)
+        pred = np.full(n_vertices, -1, dtype=np.int64)
+        for _ in range(n_vertices - 1):
+            changed = False
+            for e in range(edge_u.shape[0]):
+                d = dist[edge_u[e]] + weights[e]
+                if d < dist[edge_v[e]] - _BF_EPS:
+                    dist[edge_v[e]] = d
+                    pred[edge_v[e]] = e
+                    changed = True
+            if not changed:
+                return pred, -1
+        last = -1
+        for e in range(edge_u.shape[0]):
+            d = dist[edge_u[e]] + weights[e]
+            if d < dist[edge_v[e]] - _BF_EPS:
+                dist[edge_v[e]] = d
+                pred[edge_v[e]] = e
+                last = edge_v[e]
+        return pred, last
+else:
+    _bellman_ford_kernel = _bellman_ford_numpy
+
+
+def _extract_cycle(edge_u: np.ndarray, pred: np.ndarray, vertex: int) -> List[int]:
+    """Edge indices, in trading order, of the predecessor cycle reached from `vertex`."""
+    # Walking back |V| steps is guaranteed to land on the cycle itself
+    for _ in range(len(pred)):
+        if pred[vertex] < 0:
+            return []
+        vertex = int(edge_u[pred[vertex]])
+    cycle: List[int] = []
+    start = vertex
+    while True:
+        e = int(pred[vertex])
+        if e < 0:
+            return []
+        cycle.append(e)
+        vertex = int(edge_u[e])
+        if vertex == start or len(cycle) > len(pred):
+            break
+    cycle.reverse()
+    return cycle
+
 
 class TriangleDetector:
     """Detects triangular arbitrage opportunities in near real-time."""
@@ -11,10 +155,48 @@ class TriangleDetector:
         self.exchange = exchange
         self.config = config
         self.logger = setup_logger('TriangleDetector')
-        self.price_cache: Dict[str, Dict[str, float]] = {}
         self.require_usdt_anchor: bool = bool(self.config.get('require_usdt_anchor', True))
         self.max_triangles: int = int(self.config.get('max_triangles', 500))
         self.triangles: List[Tuple[str, str, str]] = []
+
+        # How often each triangle produced an opportunity; kept across restarts to order scans
+        self.hit_count_path = Path(self.config.get('hit_count_path', 'data/triangle_hits.json'))
+        self._hit_count: Dict[Tuple[str, str, str], int] = {}
+        self.scan_budget_us: int = int(self.config.get('scan_budget_us', 0))  # 0 = price every candidate
+
+        # Struct-of-arrays view of the market: one (bid, ask) row per pair and one
+        # row of pair indices per scannable triangle, aligned with _scan_triangles
+        self._pair_index: Dict[str, int] = {}
+        self._symbol_id: Dict[str, int] = {}  # raw exchange symbol (BTCUSDT) -> price row
+        self._prices = np.zeros((0, 2), dtype=np.float32)
+        self._price_ts = np.zeros(0, dtype=np.int64)  # exchange event time (ms) per pair row
+        self._tri_idx = np.zeros((0, 3), dtype=np.int32)
+        self._tri_sell = np.zeros((0, 3), dtype=np.bool_)  # True: sell at bid, False: buy at ask
+        self._scan_triangles: List[Tuple[str, str, str]] = []
+        self._triangle_pairs: List[Tuple[str, str, str]] = []  # listed market per leg, resolved once
+
+        # Incremental scanning: only triangles touching a repriced pair are re-evaluated
+        self._pair_to_triangles: Dict[int, List[int]] = {}
+        self._dirty_pairs: Set[int] = set()
+
+        # Currency graph for negative-cycle search: two edges per listed pair (sell at bid, buy at ask)
+        self.use_bellman_ford: bool = bool(self.config.get('use_bellman_ford', False))
+        self._currencies: List[str] = []
+        self._edge_u = np.zeros(0, dtype=np.int64)
+        self._edge_v = np.zeros(0, dtype=np.int64)
+        self._edge_row = np.zeros(0, dtype=np.int64)
+        self._edge_sell = np.zeros(0, dtype=np.bool_)
+        self._cycle_to_triangle: Dict[Tuple[str, str, str], int] = {}
+
+        # (maker, taker) per first-leg pair; fees move on the order of hours, not scans
+        self._fees: Dict[str, Tuple[float, float]] = {}
+        self._default_fees: Tuple[float, float] = (getattr(exchange, 'maker_fee', 0.001),
+                                                   getattr(exchange, 'taker_fee', 0.001))
+        self._fees_refreshed_at = 0.0
+        self._min_ratio = np.zeros(0, dtype=np.float64)  # per-triangle gross return needed to be worth pricing
+        self.fee_refresh_seconds: float = float(self.config.get('fee_refresh_seconds', 3600))
+        # One worker: scans are sequential, the point is to keep the event loop free for price feeds
+        self._scan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='triangle-scan')
         self._last_scan_time = 0
         self.scan_interval = self.config.get('scan_interval_ms', 100) / 1000  # default 100ms per cycle
 
@@ -23,23 +205,117 @@ class TriangleDetector:
         self.logger.info("Initializing triangle detector...")
         trading_pairs = await self.exchange.get_trading_pairs()
         self.triangles = self._find_triangles(trading_pairs)
+        self._load_hit_counts()
+        # Historically profitable triangles get the lowest indices, so they are priced first
+        self.triangles.sort(key=lambda tri: -self._hit_count.get(tri, 0))
+        self._build_price_arrays(trading_pairs)
+        await self._refresh_fees()
         self.logger.info(f"Found {len(self.triangles)} valid triangular paths for {self.exchange.exchange_id}")
 
+    def _load_hit_counts(self) -> None:
+        """Load per-triangle opportunity counts saved by a previous run."""
+        if not self.hit_count_path.exists():
+            return
+        try:
+            with self.hit_count_path.open('r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # Keys are "BASE|MID|QUOTE"; drop triangles that are no longer listed
+            known = set(self.triangles)
+            self._hit_count = {}
+            for key, count in saved.items():
+                triangle = tuple(key.split('|'))
+                if triangle in known:
+                    self._hit_count[triangle] = int(count)
+        except Exception as e:
+            self.logger.warning(f"Could not load triangle hit counts: {e}")
+            self._hit_count = {}
+
+    def save_hit_counts(self) -> None:
+        """Persist per-triangle opportunity counts for the next start."""
+        try:
+            self.hit_count_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.hit_count_path.open('w', encoding='utf-8') as f:
+                json.dump({'|'.join(tri): count for tri, count in self._hit_count.items()}, f)
+        except Exception as e:
+            self.logger.warning(f"Could not save triangle hit counts: {e}")
+
+    def _build_price_arrays(self, pairs: List[str]) -> None:
+        """Index listed pairs into a contiguous price array and map triangles onto it."""
+        self._pair_index = {pair: i for i, pair in enumerate(p for p in pairs if '/' in p)}
+        # Ticks arrive keyed by raw symbol: resolve them to a row with a single lookup
+        # (only where the raw form formats back to the same pair, so ambiguous concatenations keep old behaviour)
+        self._symbol_id = {raw: i for raw, i in ((pair.replace('/', ''), i) for pair, i in self._pair_index.items())
+                           if self._pair_index.get(_format_raw_symbol(raw)) == i}
+        self._prices = np.zeros((len(self._pair_index), 2), dtype=np.float32)
+        self._price_ts = np.zeros(len(self._pair_index), dtype=np.int64)
+
+        rows: List[Tuple[int, int, int]] = []
+        sides: List[Tuple[bool, bool, bool]] = []
+        self._scan_triangles = []
+        self._triangle_pairs = []
+        for base, mid, quote in self.triangles:
+            legs = [self._resolve_leg(base, mid), self._resolve_leg(mid, quote), self._resolve_leg(quote, base)]
+            # A leg with no listed market in either direction can never be traded
+            if all(legs):
+                rows.append(tuple(self._pair_index[symbol] for symbol, _ in legs))
+                sides.append(tuple(sell for _, sell in legs))
+                self._scan_triangles.append((base, mid, quote))
+                self._triangle_pairs.append(tuple(symbol for symbol, _ in legs))
+        self._tri_idx = np.array(rows, dtype=np.int32).reshape(-1, 3)
+        self._tri_sell = np.array(sides, dtype=np.bool_).reshape(-1, 3)
+
+        self._pair_to_triangles = {}
+        for tri, legs in enumerate(rows):
+            for row in set(legs):
+                self._pair_to_triangles.setdefault(row, []).append(tri)
+        self._dirty_pairs = set()
+        self._build_currency_graph()
+
+    def _build_currency_graph(self) -> None:
+        """Index currencies and lay out both trading directions of every pair as graph edges."""
+        currency_index: Dict[str, int] = {}
+        edges: List[Tuple[int, int, int, bool]] = []
+        for pair, row in self._pair_index.items():
+            base, quote = pair.split('/', 1)
+            u = currency_index.setdefault(base, len(currency_index))
+            v = currency_index.setdefault(quote, len(currency_index))
+            edges.append((u, v, row, True))   # base -> quote: sell at the bid
+            edges.append((v, u, row, False))  # quote -> base: buy at the ask
+        self._currencies = list(currency_index)
+        self._edge_u = np.array([e[0] for e in edges], dtype=np.int64)
+        self._edge_v = np.array([e[1] for e in edges], dtype=np.int64)
+        self._edge_row = np.array([e[2] for e in edges], dtype=np.int64)
+        self._edge_sell = np.array([e[3] for e in edges], dtype=np.bool_)
+
+        # Any rotation of a scannable triangle maps back to it, so 3-cycles reuse _build_opportunity
+        self._cycle_to_triangle = {}
+        for tri, (a, b, c) in enumerate(self._scan_triangles):
+            for rotation in ((a, b, c), (b, c, a), (c, a, b)):
+                self._cycle_to_triangle[rotation] = tri
+
+    def _resolve_leg(self, spend: str, receive: str) -> Optional[Tuple[str, bool]]:
+        """Listed market for converting `spend` into `receive` and whether that is a sell."""
+        symbol = f"{spend}/{receive}"
+        if symbol in self._pair_index:
+            return symbol, True  # sell base for quote at the bid
+        symbol = f"{receive}/{spend}"
+        if symbol in self._pair_index:
+            return symbol, False  # buy base with quote at the ask
+        return None
+
     def _find_triangles(self, pairs: List[str]) -> List[Tuple[str, str, str]]:
         """Build triangular combinations anchored to USDT and capped by config."""
         triangles: List[Tuple[str, str, str]] = []
-        pair_map: Set[str] = set()
+        seen: Set[FrozenSet[str]] = set()  # each currency cycle is emitted once per direction
+        has_market: Set[FrozenSet[str]] = set()  # unordered currency pairs with a listed market
         usdt_coins: Set[str] = set()
 
-        # Normalize and index pairs, collect USDT-quoted/base coins
+        # Index markets by currency pair (direction is resolved per leg later), collect USDT coins
         for pair in pairs:
             if '/' not in pair:
                 continue
             base, quote = pair.split('/')
-            norm = f"{base}/{quote}"
-            rev = f"{quote}/{base}"
-            pair_map.add(norm)
-            pair_map.add(rev)
+            has_market.add(frozenset((base, quote)))
             if base == 'USDT' and quote != 'USDT':
                 usdt_coins.add(quote)
             elif quote == 'USDT' and base != 'USDT':
@@ -47,24 +323,26 @@ class TriangleDetector:
 
         # If not requiring USDT anchor, fallback to legacy (but still cap)
         if not getattr(self, 'require_usdt_anchor', True):
-            currencies: Set[str] = set()
+            # Undirected market graph: walk real neighbours instead of every currency triple
+            neighbours: Dict[str, Set[str]] = {}
             for p in pairs:
                 if '/' in p:
                     a, b = p.split('/')
-                    currencies.update([a, b])
-            for base in currencies:
-                for mid in currencies:
-                    if mid == base:
-                        continue
-                    for quote in currencies:
-                        if quote in (base, mid):
-                            continue
-                        if (f"{base}/{mid}" in pair_map and
-                            f"{mid}/{quote}" in pair_map and
-                            f"{base}/{quote}" in pair_map):
-                            triangles.append((base, mid, quote))
-                            if len(triangles) >= getattr(self, 'max_triangles', 500):
-                                return triangles
+                    if a != b:
+                        neighbours.setdefault(a, set()).add(b)
+                        neighbours.setdefault(b, set()).add(a)
+            # Sets are only needed for membership; the loops walk sorted tuples of the
+            # neighbours that sort after each currency, so every a < b < c is visited once
+            higher: Dict[str, Tuple[str, ...]] = {
+                c: tuple(sorted(n for n in ns if n > c)) for c, ns in neighbours.items()
+            }
+
+            for a in sorted(higher):
+                adj_a = neighbours[a]
+                for b in higher[a]:
+                    for c in higher[b]:
+                        if c in adj_a and self._add_cycle(triangles, seen, a, b, c):
+                            return triangles
             return triangles
 
         # USDT-anchored triangles: USDT -> CoinA -> CoinB -> USDT
@@ -75,42 +353,77 @@ class TriangleDetector:
                 a = coins[i]
                 b = coins[j]
                 # Check cross-market exists between A and B
-                if f"{a}/{b}" in pair_map or f"{b}/{a}" in pair_map:
-                    triangles.append(('USDT', a, b))
-                    if len(triangles) >= getattr(self, 'max_triangles', 500):
-                        return triangles
+                if frozenset((a, b)) in has_market and self._add_cycle(triangles, seen, 'USDT', a, b):
+                    return triangles
         return triangles
 
+    def _add_cycle(self, triangles: List[Tuple[str, str, str]], seen: Set[FrozenSet[str]],
+                   a: str, b: str, c: str) -> bool:
+        """Add both traversals of a new cycle (bid/ask make them different trades); True once capped."""
+        cycle = frozenset((a, b, c))
+        if cycle not in seen:
+            seen.add(cycle)
+            triangles.append((a, b, c))  # a -> b -> c -> a
+            triangles.append((a, c, b))  # a -> c -> b -> a
+        return len(triangles) >= getattr(self, 'max_triangles', 500)
+
+    async def _refresh_fees(self) -> None:
+        """Fetch trading fees once per unique first-leg pair and cache them."""
+        fees: Dict[str, Tuple[float, float]] = {}
+        for pair1, _, _ in self._triangle_pairs:
+            if pair1 not in fees:
+                try:
+                    fees[pair1] = await self.exchange.get_trading_fees(pair1)
+                except Exception as e:
+                    self.logger.warning(f"Could not fetch fees for {pair1}: {e}")
+                    fees[pair1] = self._fees.get(pair1, self._default_fees)
+        self._fees = fees
+        self._fees_refreshed_at = time.time()
+        self._update_profit_thresholds()
+
+    def _update_profit_thresholds(self) -> None:
+        """Precompute the gross return each triangle must reach before it is priced in full.
+
+        A triangle is kept only if its gross profit meets min_profit AND its net profit is
+        positive. Fees are charged on every leg's amount, so the cheapest possible cost is
+        one taker fee on the initial amount plus slippage; using that lower bound means the
+        screen never rejects a triangle the full evaluation would accept.
+        """
+        min_profit_ratio = 1 + self.config.get('min_profit_percentage', 0.1) / 100
+        slippage_pct = self.config.get('max_slippage_percentage', 0.05) / 100
+        takers = np.array([self._fees.get(pair1, self._default_fees)[1] for pair1, _, _ in self._triangle_pairs],
+                          dtype=np.float64)
+        self._min_ratio = np.maximum(min_profit_ratio, 1 + slippage_pct + takers)
+
     async def update_prices(self, price_data: Dict[str, Any]) -> None:
-        """Update local price cache (called from websocket feed)."""
-        if not price_data or 'data' not in price_data:
-            return
-        data = price_data['data']
-        raw_symbol = data.get('s', '').upper()
-        if not raw_symbol:
+        """Update the price array row for a pair (called from websocket feed)."""
+        data = price_data.get('data') if isinstance(price_data, dict) else None
+        if not isinstance(data, dict):
             return
+        self._apply_tick(data.get('s', ''), data.get('b', 0), data.get('a', 0), data.get('E', 0))
 
-        formatted_symbol = self._format_symbol(raw_symbol)
-        try:
-            bid = float(data.get('b', 0))
-            ask = float(data.get('a', 0))
-            if bid > 0 and ask > 0:
-                self.price_cache[formatted_symbol] = {
-                    'bid': bid,
-                    'ask': ask,
-                    'timestamp': data.get('E', int(time.time() * 1000))
-                }
-        except Exception:
+    def _apply_tick(self, raw_symbol: str, bid: Any, ask: Any, event_time: int) -> None:
+        """Write one best bid/ask tick into the price arrays and mark the pair dirty."""
+        if not raw_symbol or not isinstance(raw_symbol, str):
             return
 
-    def _format_symbol(self, symbol: str) -> str:
-        """Convert raw symbol (e.g., BTCUSDT) to normalized pair (BTC/USDT)."""
-        common_quotes = ['USDT', 'USDC', 'BTC', 'ETH', 'BNB']
-        for quote in common_quotes:
-            if symbol.endswith(quote):
-                base = symbol[:-len(quote)]
-                return f"{base}/{quote}"
-        return symbol
+        row = self._symbol_id.get(raw_symbol)
+        if row is None:
+            row = self._pair_index.get(self._format_symbol(raw_symbol.upper()))
+            if row is None:
+                return  # not part of any scannable triangle
+            self._symbol_id[raw_symbol] = row  # e.g. lowercase stream names
+        bid = parse_price(bid)
+        ask = parse_price(ask)
+        # NaN (malformed field) fails both comparisons
+        if 0 < bid < _INF and 0 < ask < _INF:
+            self._prices[row] = (bid, ask)
+            self._price_ts[row] = event_time if isinstance(event_time, int) and event_time > 0 \
+                else int(time.time() * 1000)
+            self._dirty_pairs.add(row)
+
+    # Memoized at module level so the cache key is just the raw symbol
+    _format_symbol = staticmethod(_format_raw_symbol)
 
     async def scan_opportunities(self) -> List[ArbitrageOpportunity]:
         """
@@ -122,50 +435,111 @@ class TriangleDetector:
             return []  # Avoid overloading CPU with too many scans
         self._last_scan_time = now
 
+        if now - self._fees_refreshed_at >= self.fee_refresh_seconds:
+            await self._refresh_fees()
+
         results: List[ArbitrageOpportunity] = []
         trade_amount = self.config.get('max_trade_amount', 100)
         min_profit = self.config.get('min_profit_percentage', 0.1)  # percent
 
-        for base, mid, quote in self.triangles:
-            try:
-                opp = await self._calculate_triangle_profit(base, mid, quote, trade_amount)
-                if opp and hasattr(opp, 'is_profitable') and hasattr(opp, 'profit_percentage'):
-                    if opp.is_profitable and opp.profit_percentage >= min_profit:
-                        results.append(opp)
-            except Exception as e:
-                self.logger.error(f"Error evaluating triangle {base}-{mid}-{quote}: {e}")
-                continue
+        if not self._dirty_pairs:
+            return results  # nothing repriced since the last scan
+
+        if self.use_bellman_ford:
+            self._dirty_pairs = set()
+            return await self.scan_opportunities_bf(trade_amount, min_profit)
+
+        # Only triangles with a leg repriced since the last scan can have changed
+        dirty_pairs, self._dirty_pairs = self._dirty_pairs, set()
+        dirty = np.fromiter(
+            {tri for row in dirty_pairs for tri in self._pair_to_triangles.get(row, ())},
+            dtype=np.int64
+        )
+        if not len(dirty):
+            return results
+        dirty.sort()  # index order is hit-count order
+
+        # Gross return of every dirty triangle in one pass (sell legs at bid, buy legs at ask)
+        # against the precomputed per-triangle threshold, off the event loop thread
+        hits = await asyncio.get_running_loop().run_in_executor(
+            self._scan_pool, _scan_kernel,
+            self._tri_idx[dirty], self._tri_sell[dirty], self._prices, self._min_ratio[dirty]
+        )
+        candidates = dirty[hits]
+
+        # Phase 2: only kernel survivors are priced in full and allocated as opportunities;
+        # with a scan budget the least historically profitable tail is dropped when time runs out
+        deadline = time.perf_counter_ns() + self.scan_budget_us * 1000 if self.scan_budget_us else 0
+        for i in candidates.tolist():
+            if deadline and time.perf_counter_ns() > deadline:
+                break
+            opp = self._build_opportunity(i, trade_amount, min_profit)
+            if opp is not None:
+                results.append(opp)
 
         return results
 
-    async def _calculate_triangle_profit(
-        self,
-        base: str,
-        mid: str,
-        quote: str,
-        initial_amount: float
-    ) -> ArbitrageOpportunity:
-        """Evaluate a single triangle path for profitability."""
-        pair1, pair2, pair3 = f"{base}/{mid}", f"{mid}/{quote}", f"{base}/{quote}"
+    async def scan_opportunities_bf(self, trade_amount: float, min_profit: float) -> List[ArbitrageOpportunity]:
+        """Search the whole currency graph for a negative cycle of -log(rate) weights.
+
+        Costs O(|V|*|E|) regardless of how many triangles exist and also sees longer
+        cycles. Only 3-cycles among the scannable triangles can be executed, so those are
+        priced through _build_opportunity; longer cycles are logged for visibility.
+        """
+        if not len(self._edge_u):
+            return []
+
+        price = np.where(self._edge_sell, self._prices[self._edge_row, 0],
+                         self._prices[self._edge_row, 1]).astype(np.float64)
+        _, taker_fee = self._default_fees
+        weights = np.full(len(price), np.inf)
+        priced = price > 0
+        # Selling receives bid per unit, buying receives 1/ask; both lose one taker fee
+        log_price = np.log(price[priced])
+        weights[priced] = np.where(self._edge_sell[priced], -log_price, log_price) - np.log1p(-taker_fee)
+
+        pred, vertex = await asyncio.get_running_loop().run_in_executor(
+            self._scan_pool, _bellman_ford_kernel, self._edge_u, self._edge_v, weights, len(self._currencies)
+        )
+        if vertex < 0:
+            return []
 
-        p1, p2, p3 = self.price_cache.get(pair1), self.price_cache.get(pair2), self.price_cache.get(pair3)
-        if not (p1 and p2 and p3):
-            return None  # missing data
+        cycle = _extract_cycle(self._edge_u, pred, vertex)
+        path = tuple(self._currencies[self._edge_u[e]] for e in cycle)
+        tri = self._cycle_to_triangle.get(path) if len(path) == 3 else None
+        if tri is None:
+            if path:
+                self.logger.debug(f"Negative cycle outside scannable triangles: {' -> '.join(path)}")
+            return []
 
-        if p1['bid'] <= 0 or p2['bid'] <= 0 or p3['ask'] <= 0:
-            return None  # avoid division by zero or stale entries
+        opp = self._build_opportunity(tri, trade_amount, min_profit)
+        return [opp] if opp is not None else []
 
-        # Simulate trade path: BASE -> MID -> QUOTE -> BASE
-        amount1 = initial_amount * p1['bid']  # sell BASE for MID
-        step1 = TradeStep(pair1, 'sell', initial_amount, p1['bid'], amount1)
+    def close(self) -> None:
+        """Stop the scan worker thread and save hit counts."""
+        self._scan_pool.shutdown(wait=False)
+        self.save_hit_counts()
 
-        amount2 = amount1 * p2['bid']  # sell MID for QUOTE
-        step2 = TradeStep(pair2, 'sell', amount1, p2['bid'], amount2)
+    def _build_opportunity(self, tri: int, initial_amount: float,
+                           min_profit: float) -> Optional[ArbitrageOpportunity]:
+        """Price scannable triangle number `tri` in full; allocate it only if it clears every cost."""
+        pair1, pair2, pair3 = self._triangle_pairs[tri]
 
-        final_amount = amount2 / p3['ask']  # buy BASE with QUOTE
-        step3 = TradeStep(pair3, 'buy', amount2, p3['ask'], final_amount)
+        # Simulate trade path: BASE -> MID -> QUOTE -> BASE, each leg in its listed direction
+        legs: List[Tuple[float, float, float]] = []  # (amount in, price, amount out)
+        amount = initial_amount
+        for row, sell in zip(self._tri_idx[tri].tolist(), self._tri_sell[tri].tolist()):
+            # Integer row read from the contiguous price array (0 = no price yet)
+            price = self._prices.item(row, 0 if sell else 1)
+            if price <= 0:
+                return None  # missing data - avoid division by zero
+            received = amount * price if sell else amount / price
+            legs.append((amount, price, received))
+            amount = received
 
-        _, taker_fee = await self.exchange.get_trading_fees(pair1)
+        amount1, amount2, final_amount = legs[0][2], legs[1][2], legs[2][2]
+
+        _, taker_fee = self._fees.get(pair1, self._default_fees)
         total_fees = (
             initial_amount * taker_fee +
             amount1 * taker_fee +
@@ -175,18 +549,29 @@ class TriangleDetector:
         slippage_pct = self.config.get('max_slippage_percentage', 0.05) / 100
         est_slippage = initial_amount * slippage_pct
 
-        opp = ArbitrageOpportunity(
+        # Same tests as ArbitrageOpportunity.is_profitable / profit_percentage, before allocating
+        profit = final_amount - initial_amount
+        if profit - total_fees - est_slippage <= 0 or profit / initial_amount * 100 < min_profit:
+            return None
+
+        base, mid, quote = self._scan_triangles[tri]
+        self._hit_count[(base, mid, quote)] = self._hit_count.get((base, mid, quote), 0) + 1
+        sides = self._tri_sell[tri].tolist()
+        steps = [
+            TradeStep(symbol, 'sell' if sell else 'buy', amount_in, price, amount_out)
+            for symbol, sell, (amount_in, price, amount_out) in zip((pair1, pair2, pair3), sides, legs)
+        ]
+
+        return ArbitrageOpportunity(
             base_currency=base,
             intermediate_currency=mid,
             quote_currency=quote,
             pair1=pair1,
             pair2=pair2,
             pair3=pair3,
-            steps=[step1, step2, step3],
+            steps=steps,
             initial_amount=initial_amount,
             final_amount=final_amount,
             estimated_fees=total_fees,
             estimated_slippage=est_slippage
         )
-
-        return opp
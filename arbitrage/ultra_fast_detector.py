@@ -6,17 +6,137 @@ Executes trades within 1-2 seconds of detection to capture real opportunities
 
 import asyncio
 import time
+import aiohttp
 import ccxt.async_support as ccxt
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import logging
 from dotenv import load_dotenv
 import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from utils.compat import DATACLASS_SLOTS, install_uvloop
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import ccxt.pro as ccxtpro  # WebSocket ticker streams (bundled with ccxt>=4)
+except ImportError:
+    ccxtpro = None
 
 load_dotenv()
 
-@dataclass
+# Focus on only the most liquid triangular paths for speed
+ULTRA_FAST_TRIANGLES: List[Tuple[str, str, str]] = [
+    ('USDT', 'BTC', 'ETH'),    # Highest liquidity
+    ('USDT', 'ETH', 'BTC'),    # Reverse
+    ('USDT', 'BTC', 'USDC'),   # Stablecoin arbitrage
+    ('USDT', 'ETH', 'USDC'),   # Stablecoin arbitrage
+    ('USDT', 'BTC', 'BNB'),    # Major exchange token
+    ('USDT', 'ETH', 'BNB'),    # Major exchange token
+]
+
+# Exchange-specific high-liquidity triangles
+EXCHANGE_TRIANGLES: Dict[str, List[Tuple[str, str, str]]] = {
+    'kucoin': [
+        ('USDT', 'KCS', 'BTC'),    # KuCoin native token
+        ('USDT', 'KCS', 'ETH'),    # KuCoin native token
+        ('USDT', 'BTC', 'KCS'),    # Reverse
+        ('USDT', 'ETH', 'KCS'),    # Reverse
+    ],
+}
+
+def triangle_net_profits(bid: np.ndarray, ask: np.ndarray, direct: np.ndarray, start: float,
+                         execution_cost: float, total_costs: float) -> np.ndarray:
+    """Net profit % of every triangle at once from (N, 3) bid/ask arrays; NaN where prices are unusable.
+
+    Each leg is priced on the side a market order crosses: buys at the ask, sells at the bid.
+    """
+    valid = ((bid > 0) & (ask > 0) & (bid < ask)).all(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price1_exec = ask[:, 0] * (1 + execution_cost)
+        price2_exec = np.where(direct, bid[:, 1] * (1 - execution_cost), ask[:, 1] * (1 + execution_cost))
+        price3_exec = bid[:, 2] * (1 - execution_cost)
+        amount_intermediate = start / price1_exec
+        amount_quote = np.where(direct, amount_intermediate * price2_exec, amount_intermediate / price2_exec)
+        final_amount = amount_quote * price3_exec
+        net_profit_pct = (final_amount / start - 1) * 100 - total_costs
+    return np.where(valid, net_profit_pct, np.nan)
+
+
+def book_fill_price(levels: List[List[float]], amount: float, spend_quote: bool) -> float:
+    """Volume-weighted price for a market order walking `levels`; 0.0 if the book is too thin.
+
+    With spend_quote the order spends `amount` of quote currency (market buy against the asks),
+    otherwise it sells `amount` of base currency (market sell against the bids).
+    """
+    remaining = amount
+    base_filled = quote_filled = 0.0
+    for level in levels:
+        price, qty = level[0], level[1]
+        take = min(qty, remaining / price) if spend_quote else min(qty, remaining)
+        base_filled += take
+        quote_filled += take * price
+        remaining -= take * price if spend_quote else take
+        if remaining <= amount * 1e-12:
+            return quote_filled / base_filled
+    return 0.0
+
+
+def _compute_best_numpy(bids, asks, tri_ids, direct, start, total_costs, execution_cost, out):
+    """Fill `out` with every triangle's net profit % and return (best_idx, best_pct, final_amount).
+
+    bids/asks hold one price per symbol id; tri_ids maps each triangle's three legs to symbol ids.
+    """
+    out[:] = triangle_net_profits(bids[tri_ids], asks[tri_ids], direct, start, execution_cost, total_costs)
+    if not len(out) or np.isnan(out).all():
+        return -1, np.nan, 0.0
+    best = int(np.nanargmax(out))
+    return best, float(out[best]), start * (1 + (out[best] + total_costs) / 100)
+
+
+if NUMBA_AVAILABLE:
+    # fastmath minus nnan/ninf: unusable triangles are reported as NaN.
+    # nogil so the kernel runs on the worker thread while the loop keeps decoding WebSocket frames.
+    @njit(cache=True, nogil=True, boundscheck=False, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+    def compute_best(bids, asks, tri_ids, direct, start, total_costs, execution_cost, out):
+        best_idx = -1
+        best_pct = np.nan
+        best_final = 0.0
+        for i in range(tri_ids.shape[0]):
+            out[i] = np.nan
+            usable = True
+            for leg in range(3):
+                sid = tri_ids[i, leg]
+                if not (bids[sid] > 0 and asks[sid] > 0 and bids[sid] < asks[sid]):
+                    usable = False
+            if not usable:
+                continue
+            price1_exec = asks[tri_ids[i, 0]] * (1 + execution_cost)
+            price3_exec = bids[tri_ids[i, 2]] * (1 - execution_cost)
+            amount = start / price1_exec
+            if direct[i]:
+                amount = amount * (bids[tri_ids[i, 1]] * (1 - execution_cost))
+            else:
+                amount = amount / (asks[tri_ids[i, 1]] * (1 + execution_cost))
+            final_amount = amount * price3_exec
+            pct = (final_amount / start - 1) * 100 - total_costs
+            out[i] = pct
+            if best_idx < 0 or pct > best_pct:
+                best_idx = i
+                best_pct = pct
+                best_final = final_amount
+        return best_idx, best_pct, best_final
+else:
+    compute_best = _compute_best_numpy
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class FastOpportunity:
     """Ultra-fast arbitrage opportunity with immediate execution capability"""
     exchange_id: str
@@ -25,7 +145,7 @@ class FastOpportunity:
     profit_percentage: float
     profit_amount: float
     trade_amount: float
-    prices: Dict[str, float]
+    prices: Tuple[float, float, float, float]  # (step1, step2, step3, final_amount)
     detected_at: float  # Timestamp
     
     @property
@@ -38,17 +158,69 @@ class FastOpportunity:
 class UltraFastArbitrageDetector:
     """Ultra-fast arbitrage detector with sub-second execution"""
     
-    def __init__(self, min_profit_pct: float = 0.4, max_trade_amount: float = 20.0):
+    # Legs 2 and 3 are sized from expected fills before leg 1 executes; stay just under them
+    BATCH_SAFETY_MARGIN = 0.995
+    # IOC limit orders may fill at most this far beyond the expected price (0.2%)
+    IOC_SLIPPAGE = 0.002
+    
+    def __init__(self, min_profit_pct: float = 0.4, max_trade_amount: float = 20.0,
+                 batch_order_execution: bool = False):
         self.min_profit_pct = min_profit_pct
+        # Opt-in: batched legs 2-3 spend coins leg 1 has not bought yet, so they need existing inventory
+        self.batch_order_execution = batch_order_execution
+        # min_profit_pct raised by measured exchange latency: slower round-trips leave less edge
+        self._effective_min_pct = min_profit_pct
+        self._rtt_ms = 0.0
+        self._rtt_probe_task: Optional[asyncio.Task] = None
+        
+        # Local mirror of free balances, kept current by the user-data stream
+        self._balance: Dict[str, float] = {}
+        self._balance_task: Optional[asyncio.Task] = None
         self.max_trade_amount = max_trade_amount
         self.logger = logging.getLogger('UltraFastDetector')
         
+        # Pricing constants, fixed for the detector's lifetime
+        self._execution_cost = 0.0001  # 0.01% per trade
+        self._exec_c_plus = 1 + self._execution_cost
+        self._exec_c_minus = 1 - self._execution_cost
+        # MINIMAL round-trip trading costs (%) for ultra-fast execution
+        self._cost_by_exch = {
+            'kucoin': 0.15,    # 0.15% with KCS discount
+            'binance': 0.225,  # 0.225% with BNB discount
+            'default': 0.3,    # 0.3% standard
+        }
+        
         # Exchange connections
         self.exchanges = {}
         self.running = False
+        self._session: Optional[aiohttp.ClientSession] = None  # shared keep-alive pool for every REST call
+        
+        # Live tickers pushed by the WebSocket feed; detection only ever reads this snapshot
+        self.ticker_cache: Dict[str, dict] = {}
+        self.ticker_update_event = asyncio.Event()
+        self._ws_exchange = None
+        self._ws_ticker_task: Optional[asyncio.Task] = None
+        # Top-of-book depth per triangle pair, used to price the trade size rather than 1 unit
+        self.order_books: Dict[str, dict] = {}
+        self._ws_book_tasks: List[asyncio.Task] = []
+        
+        # (base, intermediate, quote, pair1, pair2, pair3, use_direct), resolved against the markets once
+        self.triangles: List[Tuple[str, str, str, str, str, str, bool]] = []
+        self._market_cache: Dict[str, dict] = {}  # symbol -> ccxt market for every triangle pair
+        # Struct-of-arrays price snapshot: one bid/ask slot per symbol id, written by the ticker
+        # stream, and each triangle's legs as symbol ids so the kernel never touches a dict
+        self._sym_id: Dict[str, int] = {}
+        self._bids = np.zeros(0)
+        self._asks = np.zeros(0)
+        self._tri_ids = np.zeros((0, 3), dtype=np.int32)
+        self._direct = np.zeros(0, dtype=np.bool_)
+        self._net_pct = np.zeros(0)
+        self._cpu_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ultra-fast-kernel')
         
-        # Ultra-fast execution
-        self.execution_queue = asyncio.Queue()
+        # Ultra-fast execution: a single slot the scanner overwrites, so the executor
+        # always picks up the newest opportunity instead of a backlog of stale ones
+        self._best_opp: Optional[FastOpportunity] = None
+        self._opp_event = asyncio.Event()
         self.current_opportunities = []
         
         # Statistics
@@ -80,7 +252,8 @@ class UltraFastArbitrageDetector:
                     'password': passphrase,
                     'enableRateLimit': True,
                     'sandbox': False,  # LIVE TRADING
-                    'options': {'defaultType': 'spot'}
+                    'options': {'defaultType': 'spot'},
+                    'session': self._create_http_session()
                 })
                 
             elif exchange_id == 'binance':
@@ -96,73 +269,231 @@ class UltraFastArbitrageDetector:
                     'secret': api_secret,
                     'enableRateLimit': True,
                     'sandbox': False,  # LIVE TRADING
-                    'options': {'defaultType': 'spot'}
+                    'options': {'defaultType': 'spot'},
+                    'session': self._create_http_session()
                 })
             
-            # Test connection
+            # Test connection (fetch_time first warms the pooled TCP/TLS connection)
+            await self.exchanges[exchange_id].fetch_time()
             await self.exchanges[exchange_id].load_markets()
             balance = await self.exchanges[exchange_id].fetch_balance()
             
             usdt_balance = balance.get('USDT', {}).get('free', 0)
+            self._balance = {currency: float(free or 0) for currency, free in balance.get('free', {}).items()}
             self.logger.info(f"✅ Connected to {exchange_id.upper()}")
             self.logger.info(f"💰 USDT Balance: {usdt_balance:.2f}")
             
+            self.triangles = self._build_triangle_table(exchange_id)
+            markets = self.exchanges[exchange_id].markets
+            self._market_cache = {symbol: markets[symbol] for symbol in self._watched_symbols()}
+            self._sym_id = {symbol: i for i, symbol in enumerate(self._watched_symbols())}
+            self._bids = np.zeros(len(self._sym_id))
+            self._asks = np.zeros(len(self._sym_id))
+            self._tri_ids = np.array([[self._sym_id[pair] for pair in tri[3:6]] for tri in self.triangles],
+                                     dtype=np.int32).reshape(-1, 3)
+            self._direct = np.array([tri[6] for tri in self.triangles], dtype=np.bool_)
+            self._net_pct = np.zeros(len(self.triangles))
+            # Pay the JIT compile cost now rather than on the first live scan
+            compute_best(np.ones(3), np.full(3, 2.0), np.array([[0, 1, 2]], dtype=np.int32),
+                         np.ones(1, dtype=np.bool_), 1.0, 0.0, 0.0, np.zeros(1))
+            self.logger.info(f"⚡ {len(self.triangles)} tradable triangles")
+            
+            if ccxtpro is not None and hasattr(ccxtpro, exchange_id):
+                rest = self.exchanges[exchange_id]
+                self._ws_exchange = getattr(ccxtpro, exchange_id)({'apiKey': rest.apiKey,
+                                                                   'secret': rest.secret,
+                                                                   'password': rest.password,
+                                                                   'enableRateLimit': True,
+                                                                   'options': {'defaultType': 'spot'}})
+            self._ws_ticker_task = asyncio.create_task(self._watch_tickers(exchange_id))
+            self._rtt_probe_task = asyncio.create_task(self._probe_latency(exchange_id))
+            if self._ws_exchange is not None and self._ws_exchange.has.get('watchBalance'):
+                self._balance_task = asyncio.create_task(self._watch_balance())
+            if self._ws_exchange is not None and self._ws_exchange.has.get('watchOrderBook'):
+                self._ws_book_tasks = [asyncio.create_task(self._watch_order_book(symbol))
+                                       for symbol in self._watched_symbols()]
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Failed to initialize {exchange_id}: {e}")
             return False
     
+    def _create_http_session(self) -> aiohttp.ClientSession:
+        """Pooled keep-alive session handed to ccxt so orders skip the TCP/TLS handshake"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=2000, limit_per_host=100, keepalive_timeout=75,
+                                             enable_cleanup_closed=True, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    def _build_triangle_table(self, exchange_id: str) -> List[Tuple[str, str, str, str, str, str, bool]]:
+        """Resolve every candidate triangle's pairs and pair2 direction against the listed markets."""
+        markets = self.exchanges[exchange_id].markets or {}
+        triangles = []
+        for base, intermediate, quote in ULTRA_FAST_TRIANGLES + EXCHANGE_TRIANGLES.get(exchange_id, []):
+            pair1 = f"{intermediate}/{base}"      # e.g., BTC/USDT
+            pair3 = f"{quote}/{base}"             # e.g., ETH/USDT
+            if pair1 not in markets or pair3 not in markets:
+                continue
+            
+            # Get pair2 (try both directions)
+            if f"{intermediate}/{quote}" in markets:     # e.g., BTC/ETH
+                triangles.append((base, intermediate, quote, pair1, f"{intermediate}/{quote}", pair3, True))
+            elif f"{quote}/{intermediate}" in markets:   # e.g., ETH/BTC
+                triangles.append((base, intermediate, quote, pair1, f"{quote}/{intermediate}", pair3, False))
+        return triangles
+    
+    def _watched_symbols(self) -> List[str]:
+        """Every pair the triangle table trades."""
+        return sorted({pair for tri in self.triangles for pair in tri[3:6]})
+    
+    async def _watch_tickers(self, exchange_id: str):
+        """Keep ticker_cache current from the exchange's WebSocket ticker channel"""
+        symbols = self._watched_symbols()
+        exchange = self.exchanges[exchange_id]
+        
+        if self._ws_exchange is not None and self._ws_exchange.has.get('watchTickers'):
+            self.logger.info(f"⚡ Streaming {len(symbols)} tickers over WebSocket")
+        else:
+            self.logger.warning("⚠️ WebSocket tickers unavailable, polling REST instead")
+        
+        while True:  # cancelled from run() on shutdown
+            try:
+                if self._ws_exchange is not None and self._ws_exchange.has.get('watchTickers'):
+                    tickers = await self._ws_exchange.watch_tickers(symbols)
+                else:
+                    tickers = await exchange.fetch_tickers(symbols)
+                    await asyncio.sleep(0.2)
+                self.ticker_cache.update(tickers)
+                sym_id, bids, asks = self._sym_id, self._bids, self._asks
+                for symbol, ticker in tickers.items():
+                    sid = sym_id.get(symbol)
+                    if sid is not None:
+                        bids[sid] = ticker.get('bid') or 0.0
+                        asks[sid] = ticker.get('ask') or 0.0
+                self.ticker_update_event.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Ticker stream error: {e}")
+                await asyncio.sleep(1)
+    
+    async def _probe_latency(self, exchange_id: str, interval: float = 10.0):
+        """Measure REST round-trip time and raise the profit threshold when the link is slow"""
+        exchange = self.exchanges[exchange_id]
+        while True:  # cancelled from run() on shutdown
+            try:
+                t0 = time.perf_counter()
+                await exchange.fetch_time()
+                self._rtt_ms = (time.perf_counter() - t0) * 1000
+                # +0.001% per ms above a 50ms baseline
+                self._effective_min_pct = self.min_profit_pct + max(0.0, (self._rtt_ms - 50) / 1000)
+                if self._rtt_ms > 150:
+                    self.logger.warning(f"⚠️ High latency {self._rtt_ms:.0f}ms - min profit raised to {self._effective_min_pct:.4f}%")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Latency probe failed: {e}")
+            await asyncio.sleep(interval)
+    
+    async def _watch_balance(self):
+        """Mirror free balances from the private user-data stream (updates on every fill)"""
+        while True:  # cancelled from run() on shutdown
+            try:
+                balance = await self._ws_exchange.watch_balance()
+                for currency, free in balance.get('free', {}).items():
+                    self._balance[currency] = float(free or 0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Balance stream error: {e}")
+                await asyncio.sleep(1)
+    
+    async def _refresh_balance(self, exchange) -> None:
+        """REST balance refresh at a trade boundary when there is no balance stream"""
+        if self._balance_task is not None and not self._balance_task.done():
+            return
+        balance = await exchange.fetch_balance()
+        self._balance = {currency: float(free or 0) for currency, free in balance.get('free', {}).items()}
+    
+    async def _watch_order_book(self, symbol: str):
+        """Keep the 5-level order book for one triangle pair current"""
+        while True:  # cancelled from run() on shutdown
+            try:
+                self.order_books[symbol] = await self._ws_exchange.watch_order_book(symbol, 5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Order book stream error for {symbol}: {e}")
+                self.order_books.pop(symbol, None)
+                await asyncio.sleep(1)
+    
+    def _leg_price(self, symbol: str, ticker: dict, amount: float, buy: bool) -> float:
+        """Price a market leg of `amount` would get: book VWAP when depth is streamed, else touch price"""
+        book = self.order_books.get(symbol)
+        if book:
+            levels = book['asks'] if buy else book['bids']
+            if levels:
+                return book_fill_price(levels, amount, spend_quote=buy)
+        return float(ticker['ask'] if buy else ticker['bid'])
+    
     async def ultra_fast_scan_and_execute(self, exchange_id: str = 'kucoin'):
         """Ultra-fast scan and execute in one operation"""
         self.logger.info(f"⚡ Starting ULTRA-FAST arbitrage on {exchange_id.upper()}")
         self.logger.info(f"   Target: Execute within 1-2 seconds of detection")
         
-        exchange = self.exchanges[exchange_id]
         self.running = True
         
         # Start execution worker
         execution_task = asyncio.create_task(self._ultra_fast_executor())
         
         scan_count = 0
+        log = self.logger.info
+        perf_counter = time.perf_counter
         
         try:
             while self.running:
                 scan_count += 1
-                scan_start = time.time()
+                wait_start = perf_counter()
                 
-                self.logger.info(f"⚡ ULTRA-FAST Scan #{scan_count} - {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
+                # Scan as soon as the feed pushes new prices - no polling round-trip
+                await self.ticker_update_event.wait()
+                self.ticker_update_event.clear()
+                scan_start = perf_counter()
+                verbose = self.logger.isEnabledFor(logging.INFO)
                 
-                # Get fresh tickers (this is the bottleneck - optimize it)
-                tickers = await exchange.fetch_tickers()
-                ticker_time = (time.time() - scan_start) * 1000
+                if verbose:
+                    log("⚡ ULTRA-FAST Scan #%d t=%.3f", scan_count, scan_start)
                 
-                if not tickers:
-                    await asyncio.sleep(1)
-                    continue
+                tickers = self.ticker_cache
                 
-                # Ultra-fast opportunity detection
-                opportunities = await self._ultra_fast_detection(exchange_id, tickers)
-                detection_time = (time.time() - scan_start) * 1000
+                # Ultra-fast opportunity detection: kernel on the worker thread, then plain Python
+                opportunities = []
+                if await self._score_triangles(exchange_id):
+                    opportunities = self._ultra_fast_detection(exchange_id, tickers)
+                detection_end = perf_counter()
                 
                 if opportunities:
-                    self.logger.info(f"⚡ LIGHTNING FAST: Found {len(opportunities)} opportunities in {detection_time:.0f}ms")
+                    if verbose:
+                        log("⚡ LIGHTNING FAST: Found %d opportunities in %.0fms",
+                            len(opportunities), (detection_end - scan_start) * 1000)
                     
                     # Queue the BEST opportunity for immediate execution
                     best_opportunity = opportunities[0]
                     
                     # Only execute if opportunity is fresh (detected within last 2 seconds)
                     if best_opportunity.age_seconds < 2.0:
-                        await self.execution_queue.put(best_opportunity)
-                        self.logger.info(f"⚡ QUEUED FOR IMMEDIATE EXECUTION: {best_opportunity}")
+                        self._best_opp = best_opportunity
+                        self._opp_event.set()
+                        log("⚡ QUEUED FOR IMMEDIATE EXECUTION: %s", best_opportunity)
                     else:
-                        self.logger.warning(f"⚠️ Opportunity too old ({best_opportunity.age_seconds:.1f}s), skipping")
-                
-                total_scan_time = (time.time() - scan_start) * 1000
-                self.logger.info(f"⚡ Scan complete: {total_scan_time:.0f}ms (ticker: {ticker_time:.0f}ms, detection: {detection_time:.0f}ms)")
+                        self.logger.warning("⚠️ Opportunity too old (%.1fs), skipping", best_opportunity.age_seconds)
                 
-                # Ultra-short delay for maximum speed
-                await asyncio.sleep(0.2)  # 200ms between scans
+                if verbose:
+                    scan_end = perf_counter()
+                    log("⚡ Scan complete: %.0fms (ticker wait: %.0fms, detection: %.0fms)",
+                        (scan_end - scan_start) * 1000, (scan_start - wait_start) * 1000,
+                        (detection_end - scan_start) * 1000)
                 
         except KeyboardInterrupt:
             self.logger.info("⚡ Ultra-fast scanning stopped by user")
@@ -170,157 +501,117 @@ class UltraFastArbitrageDetector:
             self.running = False
             execution_task.cancel()
     
-    async def _ultra_fast_detection(self, exchange_id: str, tickers: Dict[str, Any]) -> List[FastOpportunity]:
-        """Ultra-fast opportunity detection with minimal processing"""
+    async def _score_triangles(self, exchange_id: str) -> bool:
+        """Refresh self._net_pct on the kernel thread; True if the best triangle clears the threshold"""
+        if not self.triangles:
+            return False
+        
+        # One pass over every triangle straight off the price arrays the ticker stream maintains,
+        # run on the worker thread so WebSocket frames keep being decoded meanwhile
+        total_costs = self._cost_by_exch.get(exchange_id, self._cost_by_exch['default'])
+        best_idx, _, _ = await asyncio.get_running_loop().run_in_executor(
+            self._cpu_pool, compute_best, self._bids, self._asks, self._tri_ids, self._direct,
+            self.max_trade_amount, total_costs, self._execution_cost, self._net_pct
+        )
+        return best_idx >= 0 and bool(self._net_pct[best_idx] >= self._effective_min_pct)
+    
+    def _ultra_fast_detection(self, exchange_id: str, tickers: Dict[str, Any]) -> List[FastOpportunity]:
+        """Ultra-fast opportunity detection from the net profits left by _score_triangles"""
         opportunities = []
         detection_start = time.time()
+        total_costs = self._cost_by_exch.get(exchange_id, self._cost_by_exch['default'])
         
-        # Focus on only the most liquid triangular paths for speed
-        ultra_fast_triangles = [
-            ('USDT', 'BTC', 'ETH'),    # Highest liquidity
-            ('USDT', 'ETH', 'BTC'),    # Reverse
-            ('USDT', 'BTC', 'USDC'),   # Stablecoin arbitrage
-            ('USDT', 'ETH', 'USDC'),   # Stablecoin arbitrage
-            ('USDT', 'BTC', 'BNB'),    # Major exchange token
-            ('USDT', 'ETH', 'BNB'),    # Major exchange token
-        ]
-        
-        # Add exchange-specific high-liquidity triangles
-        if exchange_id == 'kucoin':
-            ultra_fast_triangles.extend([
-                ('USDT', 'KCS', 'BTC'),    # KuCoin native token
-                ('USDT', 'KCS', 'ETH'),    # KuCoin native token
-                ('USDT', 'BTC', 'KCS'),    # Reverse
-                ('USDT', 'ETH', 'KCS'),    # Reverse
-            ])
+        # Only candidates are built into opportunities
+        net_profit_pct = self._net_pct
+        with np.errstate(invalid='ignore'):
+            candidates = np.flatnonzero((net_profit_pct >= self._effective_min_pct) & (net_profit_pct <= 5.0))
         
-        for base, intermediate, quote in ultra_fast_triangles:
-            try:
-                opportunity = await self._calculate_ultra_fast_profit(
-                    exchange_id, tickers, base, intermediate, quote, detection_start
-                )
-                
-                if opportunity and opportunity.profit_percentage >= self.min_profit_pct:
-                    opportunities.append(opportunity)
-                    self.opportunities_detected += 1
-                    
-            except Exception as e:
-                continue  # Skip errors for speed
+        # Kernel survivors have all three tickers with usable prices, so nothing here can raise
+        for i in candidates.tolist():
+            opportunity = self._calculate_ultra_fast_profit(
+                exchange_id, tickers, self.triangles[i], total_costs, detection_start
+            )
+            
+            if opportunity and opportunity.profit_percentage >= self._effective_min_pct:
+                opportunities.append(opportunity)
+                self.opportunities_detected += 1
         
         # Sort by profit (highest first)
         opportunities.sort(key=lambda x: x.profit_percentage, reverse=True)
         
         return opportunities[:3]  # Return only top 3 for speed
     
-    async def _calculate_ultra_fast_profit(self, exchange_id: str, tickers: Dict[str, Any], 
-                                         base: str, intermediate: str, quote: str, 
-                                         detection_time: float) -> Optional[FastOpportunity]:
+    def _calculate_ultra_fast_profit(self, exchange_id: str, tickers: Dict[str, Any],
+                                     triangle: Tuple[str, str, str, str, str, str, bool],
+                                     total_costs: float, detection_time: float) -> Optional[FastOpportunity]:
         """Ultra-fast profit calculation with minimal overhead"""
-        try:
-            # Required pairs
-            pair1 = f"{intermediate}/{base}"      # e.g., BTC/USDT
-            pair2 = f"{intermediate}/{quote}"     # e.g., BTC/ETH
-            pair3 = f"{quote}/{base}"             # e.g., ETH/USDT
-            
-            # Try alternative pair2
-            alt_pair2 = f"{quote}/{intermediate}" # e.g., ETH/BTC
-            
-            # Quick validation - all pairs must exist
-            if not (pair1 in tickers and pair3 in tickers):
-                return None
-            
-            # Get pair2 (try both directions)
-            if pair2 in tickers:
-                use_direct = True
-                pair2_symbol = pair2
-                t2 = tickers[pair2]
-            elif alt_pair2 in tickers:
-                use_direct = False
-                pair2_symbol = alt_pair2
-                t2 = tickers[alt_pair2]
-            else:
-                return None
-            
-            # Get ticker data
-            t1, t3 = tickers[pair1], tickers[pair3]
-            
-            # Quick price validation
-            prices = [
-                (t1.get('bid', 0), t1.get('ask', 0)),
-                (t2.get('bid', 0), t2.get('ask', 0)),
-                (t3.get('bid', 0), t3.get('ask', 0))
-            ]
-            
-            if not all(bid > 0 and ask > 0 and bid < ask for bid, ask in prices):
-                return None
-            
-            # ULTRA-FAST calculation using mid-prices for speed
-            price1 = (float(t1['bid']) + float(t1['ask'])) / 2
-            price2 = (float(t2['bid']) + float(t2['ask'])) / 2
-            price3 = (float(t3['bid']) + float(t3['ask'])) / 2
-            
-            # Apply minimal execution cost (0.01% per trade)
-            execution_cost = 0.0001  # 0.01% per trade
-            price1_exec = price1 * (1 + execution_cost)
-            price3_exec = price3 * (1 - execution_cost)
-            
-            if use_direct:
-                price2_exec = price2 * (1 - execution_cost)
-            else:
-                price2_exec = price2 * (1 + execution_cost)
-            
-            # Calculate triangle
-            start_amount = self.max_trade_amount
-            
-            # Step 1: base → intermediate
-            amount_intermediate = start_amount / price1_exec
-            
-            # Step 2: intermediate → quote
-            if use_direct:
-                amount_quote = amount_intermediate * price2_exec
-            else:
-                amount_quote = amount_intermediate / price2_exec
-            
-            # Step 3: quote → base
-            final_amount = amount_quote * price3_exec
-            
-            # Calculate profit
-            gross_profit = final_amount - start_amount
-            gross_profit_pct = (gross_profit / start_amount) * 100
-            
-            # Apply MINIMAL trading costs for ultra-fast execution
-            if exchange_id == 'kucoin':
-                total_costs = 0.15  # 0.15% with KCS discount
-            elif exchange_id == 'binance':
-                total_costs = 0.225  # 0.225% with BNB discount
-            else:
-                total_costs = 0.3  # 0.3% standard
-            
-            net_profit_pct = gross_profit_pct - total_costs
-            net_profit_amount = start_amount * (net_profit_pct / 100)
-            
-            # Return opportunity if profitable
-            if net_profit_pct >= self.min_profit_pct and abs(net_profit_pct) <= 5.0:
-                return FastOpportunity(
-                    exchange_id=exchange_id,
-                    path=[base, intermediate, quote],
-                    pairs=[pair1, pair2_symbol, pair3],
-                    profit_percentage=net_profit_pct,
-                    profit_amount=net_profit_amount,
-                    trade_amount=start_amount,
-                    prices={
-                        'step1': price1_exec,
-                        'step2': price2_exec,
-                        'step3': price3_exec,
-                        'final_amount': final_amount
-                    },
-                    detected_at=detection_time
-                )
-            
+        base, intermediate, quote, pair1, pair2_symbol, pair3, use_direct = triangle
+        
+        # Get ticker data (a pair may not have streamed its first tick yet)
+        t1, t2, t3 = tickers.get(pair1), tickers.get(pair2_symbol), tickers.get(pair3)
+        if t1 is None or t2 is None or t3 is None:
             return None
-            
-        except Exception as e:
+        
+        # Quick price validation (ccxt leaves missing prices as None)
+        prices = [
+            (t1.get('bid') or 0, t1.get('ask') or 0),
+            (t2.get('bid') or 0, t2.get('ask') or 0),
+            (t3.get('bid') or 0, t3.get('ask') or 0)
+        ]
+        
+        if not all(bid > 0 and ask > 0 and bid < ask for bid, ask in prices):
+            return None
+        
+        # Price each leg on the side the market order crosses (buy at ask, sell at bid),
+        # walking the book for the actual size; a book too thin for the size yields 0
+        start_amount = self.max_trade_amount
+        
+        # Step 1: base → intermediate (buy pair1 spending base)
+        price1 = self._leg_price(pair1, t1, start_amount, buy=True)
+        if price1 <= 0:
+            return None
+        price1_exec = price1 * self._exec_c_plus
+        amount_intermediate = start_amount / price1_exec
+        
+        # Step 2: intermediate → quote (sell a direct pair, buy an inverse one spending intermediate)
+        price2 = self._leg_price(pair2_symbol, t2, amount_intermediate, buy=not use_direct)
+        if price2 <= 0:
+            return None
+        if use_direct:
+            price2_exec = price2 * self._exec_c_minus
+            amount_quote = amount_intermediate * price2_exec
+        else:
+            price2_exec = price2 * self._exec_c_plus
+            amount_quote = amount_intermediate / price2_exec
+        
+        # Step 3: quote → base (sell pair3)
+        price3 = self._leg_price(pair3, t3, amount_quote, buy=False)
+        if price3 <= 0:
             return None
+        price3_exec = price3 * self._exec_c_minus
+        final_amount = amount_quote * price3_exec
+        
+        # Calculate profit
+        gross_profit = final_amount - start_amount
+        gross_profit_pct = (gross_profit / start_amount) * 100
+        
+        net_profit_pct = gross_profit_pct - total_costs
+        net_profit_amount = start_amount * (net_profit_pct / 100)
+        
+        # Return opportunity if profitable
+        if net_profit_pct >= self._effective_min_pct and abs(net_profit_pct) <= 5.0:
+            return FastOpportunity(
+                exchange_id=exchange_id,
+                path=[base, intermediate, quote],
+                pairs=[pair1, pair2_symbol, pair3],
+                profit_percentage=net_profit_pct,
+                profit_amount=net_profit_amount,
+                trade_amount=start_amount,
+                prices=(price1_exec, price2_exec, price3_exec, final_amount),
+                detected_at=detection_time
+            )
+        
+        return None
     
     async def _ultra_fast_executor(self):
         """Ultra-fast execution worker - executes trades immediately"""
@@ -329,16 +620,27 @@ class UltraFastArbitrageDetector:
         while self.running:
             try:
                 # Wait for opportunities with timeout
-                opportunity = await asyncio.wait_for(self.execution_queue.get(), timeout=1.0)
+                await asyncio.wait_for(self._opp_event.wait(), timeout=1.0)
+                opportunity, self._best_opp = self._best_opp, None
+                self._opp_event.clear()
+                if opportunity is None:
+                    continue
                 
                 # Check if opportunity is still fresh (under 3 seconds old)
                 if opportunity.age_seconds > 3.0:
                     self.logger.warning(f"⚠️ Opportunity expired ({opportunity.age_seconds:.1f}s old), skipping")
                     continue
                 
+                # Funds check against the local mirror - no REST call on the way to the order
+                usdt_free = self._balance.get(opportunity.path[0], 0.0)
+                if usdt_free < opportunity.trade_amount:
+                    self.logger.warning(f"⚠️ Insufficient {opportunity.path[0]} ({usdt_free:.2f} < {opportunity.trade_amount:.2f}), skipping")
+                    continue
+                
                 # IMMEDIATE EXECUTION
                 self.logger.info(f"⚡ IMMEDIATE EXECUTION: {opportunity}")
                 success = await self._execute_ultra_fast_trade(opportunity)
+                await self._refresh_balance(self.exchanges[opportunity.exchange_id])
                 
                 if success:
                     self.trades_executed += 1
@@ -349,11 +651,10 @@ class UltraFastArbitrageDetector:
                     self.trades_executed += 1
                     self.logger.error(f"❌ Ultra-fast trade failed")
                 
-                # Brief pause to avoid overwhelming the exchange
-                await asyncio.sleep(0.5)
+                # No fixed pause: ccxt's enableRateLimit paces requests to the exchange
                 
             except asyncio.TimeoutError:
-                continue  # No opportunities in queue
+                continue  # No new opportunity
             except Exception as e:
                 self.logger.error(f"Error in ultra-fast executor: {e}")
                 await asyncio.sleep(1)
@@ -369,67 +670,215 @@ class UltraFastArbitrageDetector:
             self.logger.info(f"   Profit: {opportunity.profit_percentage:.4f}%")
             self.logger.info(f"   Age: {opportunity.age_seconds:.1f}s")
             
-            # Step 1: USDT → intermediate (e.g., USDT → BTC)
-            pair1 = opportunity.pairs[0]  # BTC/USDT
-            quantity1 = opportunity.trade_amount  # $20 USDT
-            
-            self.logger.info(f"⚡ Step 1: Buy {pair1} with ${quantity1}")
-            order1 = await exchange.create_market_order(pair1, 'buy', quantity1)
-            
-            if not order1 or order1.get('status') != 'closed':
-                self.logger.error(f"❌ Step 1 failed")
+            # One request for all three legs when enabled, supported, and the inventory covers legs 2-3
+            if self.batch_order_execution and exchange.has.get('createOrders'):
+                orders = self._plan_batched_legs(opportunity)
+                if self._holds_batch_inventory(opportunity, orders):
+                    final_usdt = await self._execute_batched_legs(exchange, opportunity, orders)
+                    if final_usdt is None:
+                        return False
+                    return self._report_ultra_fast_trade(opportunity, final_usdt, execution_start)
+                self.logger.info("⚡ Batch: inventory does not cover legs 2-3, trading legs in sequence")
+            
+            # Everything the later legs need is worked out before the first order goes out
+            pair1, pair2, pair3 = opportunity.pairs  # BTC/USDT, BTC/ETH or ETH/BTC, ETH/USDT
+            side2 = 'sell' if pair2.startswith(opportunity.path[1]) else 'buy'  # direct vs inverse pair
+            limit1, limit2, limit3 = self._ioc_limits(opportunity, side2)
+            # Balances before the trade decide whether a leg may go out ahead of the previous fill
+            held_intermediate = self._balance.get(opportunity.path[1], 0.0)
+            held_quote = self._balance.get(opportunity.path[2], 0.0)
+            
+            # Step 1: USDT → intermediate (e.g., USDT → BTC), as much as the USDT buys at the cap
+            quantity1 = opportunity.trade_amount / limit1
+            self.logger.info(f"⚡ Step 1: Buy {quantity1:.8f} {pair1} (IOC ≤ {limit1:.8f})")
+            order1 = await self._place_ioc_order(exchange, pair1, 'buy', quantity1, limit1)
+            
+            # Step 2: intermediate → quote (e.g., BTC → ETH), sent while step 1's fill is confirmed
+            self.logger.info(f"⚡ Step 2: Trade {pair2}")
+            amount_intermediate, order2 = await self._chain_ioc_leg(
+                exchange, pair1, 'buy', order1, quantity1, held_intermediate, pair2, side2, limit2)
+            if amount_intermediate <= 0:
+                self.logger.error(f"❌ Step 1 not filled within the price cap - nothing to unwind")
                 return False
-            
-            amount_intermediate = float(order1['filled'])
             self.logger.info(f"✅ Step 1: Got {amount_intermediate:.8f} {opportunity.path[1]}")
             
-            # Step 2: intermediate → quote (e.g., BTC → ETH)
-            pair2 = opportunity.pairs[1]  # BTC/ETH or ETH/BTC
-            
-            self.logger.info(f"⚡ Step 2: Trade {pair2}")
-            
-            if pair2.startswith(opportunity.path[1]):  # Direct pair
-                order2 = await exchange.create_market_order(pair2, 'sell', amount_intermediate)
-            else:  # Inverse pair
-                order2 = await exchange.create_market_order(pair2, 'buy', amount_intermediate)
-            
-            if not order2 or order2.get('status') != 'closed':
-                self.logger.error(f"❌ Step 2 failed")
+            # Step 3: quote → USDT (e.g., ETH → USDT), sent while step 2's fill is confirmed
+            self.logger.info(f"⚡ Step 3: Sell {pair3}")
+            expected_quote = amount_intermediate * limit2 if side2 == 'sell' else amount_intermediate / limit2
+            amount_quote, order3 = await self._chain_ioc_leg(
+                exchange, pair2, side2, order2, expected_quote, held_quote, pair3, 'sell', limit3)
+            if amount_quote <= 0:
+                self.logger.error(f"❌ Step 2 not filled within the price cap - holding {amount_intermediate:.8f} {opportunity.path[1]}")
                 return False
-            
-            amount_quote = float(order2['filled'])
             self.logger.info(f"✅ Step 2: Got {amount_quote:.8f} {opportunity.path[2]}")
             
-            # Step 3: quote → USDT (e.g., ETH → USDT)
-            pair3 = opportunity.pairs[2]  # ETH/USDT
-            
-            self.logger.info(f"⚡ Step 3: Sell {pair3}")
-            order3 = await exchange.create_market_order(pair3, 'sell', amount_quote)
-            
-            if not order3 or order3.get('status') != 'closed':
-                self.logger.error(f"❌ Step 3 failed")
+            final_usdt = self._ioc_received(order3, 'sell')
+            if final_usdt <= 0:
+                self.logger.error(f"❌ Step 3 not filled within the price cap - holding {amount_quote:.8f} {opportunity.path[2]}")
                 return False
             
-            final_usdt = float(order3['cost'])
-            execution_time = (time.time() - execution_start) * 1000
-            
-            # Calculate actual profit
-            actual_profit = final_usdt - opportunity.trade_amount
-            actual_profit_pct = (actual_profit / opportunity.trade_amount) * 100
-            
-            self.logger.info(f"🎉 ULTRA-FAST TRADE COMPLETED:")
-            self.logger.info(f"   Initial: ${opportunity.trade_amount:.2f} USDT")
-            self.logger.info(f"   Final: ${final_usdt:.2f} USDT")
-            self.logger.info(f"   Actual Profit: ${actual_profit:.4f} ({actual_profit_pct:.4f}%)")
-            self.logger.info(f"   Execution Time: {execution_time:.0f}ms")
-            self.logger.info(f"   Total Time: {(time.time() - opportunity.detected_at)*1000:.0f}ms from detection")
-            
-            return actual_profit > 0
+            return self._report_ultra_fast_trade(opportunity, final_usdt, execution_start)
             
         except Exception as e:
             self.logger.error(f"❌ Ultra-fast execution failed: {e}")
             return False
     
+    async def _chain_ioc_leg(self, exchange, prev_symbol: str, prev_side: str, prev_order: Optional[dict],
+                             expected_in: float, held: float, symbol: str, side: str,
+                             price: float) -> Tuple[float, Optional[dict]]:
+        """Place the next IOC leg; returns (amount the previous leg delivered, next leg's final order).
+
+        If the `held` balance could not cover the next leg on its own, it is sent at once, sized just
+        under the expected fill, while the previous leg's final state is fetched: should that fill
+        fall short, the exchange rejects the early order and the leg is re-sent from the actual
+        amount. Otherwise the leg waits for the fill, so a missed leg never trades existing inventory.
+        """
+        def quantity(amount: float) -> float:
+            return amount if side == 'sell' else amount / price
+        
+        early_in = expected_in * self.BATCH_SAFETY_MARGIN
+        next_order: Any = None
+        if prev_order and held < early_in:
+            prev_final, next_order = await asyncio.gather(
+                self._ioc_final_state(exchange, prev_symbol, prev_order),
+                self._place_ioc_order(exchange, symbol, side, quantity(early_in), price),
+                return_exceptions=True
+            )
+            if isinstance(prev_final, BaseException):
+                raise prev_final
+            if isinstance(next_order, BaseException):
+                self.logger.info(f"⚡ Early {symbol} order not accepted ({next_order}), re-sending from the fill")
+                next_order = None
+        else:
+            prev_final = await self._ioc_final_state(exchange, prev_symbol, prev_order)
+        
+        received = self._ioc_received(prev_final, prev_side)
+        if received <= 0:
+            if next_order:
+                # Should have been rejected for lack of funds; surface it if it was not
+                next_order = await self._ioc_final_state(exchange, symbol, next_order)
+                if self._ioc_received(next_order, side) > 0:
+                    self.logger.error(f"⚠️ Early {side} {symbol} filled although {prev_symbol} did not")
+            return received, None
+        if next_order is None:
+            next_order = await self._place_ioc_order(exchange, symbol, side, quantity(received), price)
+        return received, await self._ioc_final_state(exchange, symbol, next_order)
+    
+    def _ioc_limits(self, opportunity: FastOpportunity, side2: str) -> Tuple[float, float, float]:
+        """Worst acceptable price per leg: expected price moved against us by IOC_SLIPPAGE"""
+        up, down = 1 + self.IOC_SLIPPAGE, 1 - self.IOC_SLIPPAGE
+        step1, step2, step3, _ = opportunity.prices
+        return step1 * up, step2 * (down if side2 == 'sell' else up), step3 * down
+    
+    @staticmethod
+    def _ioc_received(order: Optional[dict], side: str) -> float:
+        """What an IOC order delivered: base bought, or quote received for a sell; 0 if nothing filled"""
+        if not order:
+            return 0.0
+        filled = float(order.get('filled') or 0)
+        if filled <= 0:
+            return 0.0
+        if side == 'buy':
+            return filled
+        return float(order.get('cost') or filled * float(order.get('average') or order.get('price') or 0))
+    
+    async def _ioc_final_state(self, exchange, symbol: str, order: Optional[dict]) -> Optional[dict]:
+        """Final state of an IOC order; some exchanges (KuCoin) only return the order id on create"""
+        if not order or not order.get('id'):
+            return order
+        if order.get('filled') is not None and order.get('status') in ('closed', 'canceled'):
+            return order
+        try:
+            return await exchange.fetch_order(order['id'], symbol)
+        except Exception as e:
+            self.logger.error(f"❌ Could not fetch order {order['id']} on {symbol}: {e}")
+            return order
+    
+    async def _place_ioc_order(self, exchange, symbol: str, side: str, amount: float, price: float) -> Optional[dict]:
+        """Immediate-or-cancel limit order; legs below the market minimum (bound at init) are not sent"""
+        market = self._market_cache.get(symbol) or {}
+        min_amount = (market.get('limits', {}).get('amount') or {}).get('min')
+        if min_amount and amount < min_amount:
+            self.logger.warning(f"⚠️ {symbol} {side} {amount:.8f} is below the market minimum {min_amount}")
+            return None
+        return await exchange.create_order(symbol, 'limit', side, amount, price, {'timeInForce': 'IOC'})
+    
+    def _plan_batched_legs(self, opportunity: FastOpportunity) -> List[dict]:
+        """create_orders entries for all three IOC legs, sized from the expected fills"""
+        pair1, pair2, pair3 = opportunity.pairs
+        side2 = 'sell' if pair2.startswith(opportunity.path[1]) else 'buy'
+        limit1, limit2, limit3 = self._ioc_limits(opportunity, side2)
+        
+        # Leg 2/3 sizes cannot wait for leg 1's fill, so use the expected amounts with a margin
+        step1, step2, _, _ = opportunity.prices
+        amount_intermediate = opportunity.trade_amount / step1 * self.BATCH_SAFETY_MARGIN
+        if side2 == 'sell':
+            quantity2 = amount_intermediate
+            amount_quote = amount_intermediate * step2
+        else:
+            quantity2 = amount_intermediate / limit2
+            amount_quote = quantity2
+        
+        ioc = {'timeInForce': 'IOC'}
+        return [
+            {'symbol': pair1, 'type': 'limit', 'side': 'buy', 'amount': opportunity.trade_amount / limit1,
+             'price': limit1, 'params': ioc},
+            {'symbol': pair2, 'type': 'limit', 'side': side2, 'amount': quantity2, 'price': limit2, 'params': ioc},
+            {'symbol': pair3, 'type': 'limit', 'side': 'sell', 'amount': amount_quote * self.BATCH_SAFETY_MARGIN,
+             'price': limit3, 'params': ioc},
+        ]
+    
+    def _holds_batch_inventory(self, opportunity: FastOpportunity, orders: List[dict]) -> bool:
+        """Legs 2-3 execute alongside leg 1, so the coins they spend must already be in the account"""
+        leg2, leg3 = orders[1], orders[2]
+        spend2 = leg2['amount'] if leg2['side'] == 'sell' else leg2['amount'] * leg2['price']
+        return (self._balance.get(opportunity.path[1], 0.0) >= spend2 and
+                self._balance.get(opportunity.path[2], 0.0) >= leg3['amount'])
+    
+    async def _execute_batched_legs(self, exchange, opportunity: FastOpportunity,
+                                    orders: List[dict]) -> Optional[float]:
+        """Submit all three legs in one create_orders request; returns the USDT received"""
+        self.logger.info(f"⚡ Batch: placing {len(orders)} IOC legs in one request")
+        results = await exchange.create_orders(orders)
+        results = await asyncio.gather(*(self._ioc_final_state(exchange, leg['symbol'], order)
+                                         for order, leg in zip(results, orders)))
+        
+        received = [self._ioc_received(order, leg['side']) for order, leg in zip(results, orders)]
+        if len(results) != 3 or not all(amount > 0 for amount in received):
+            # Legs that did fill have moved inventory; report exactly what so it can be rebalanced
+            filled = [f"{leg['side']} {leg['symbol']} → {amount:.8f}"
+                      for leg, amount in zip(orders, received) if amount > 0]
+            self.logger.error(f"❌ Batch order failed: {[order.get('status') if order else None for order in results]}")
+            if filled:
+                self.logger.error(f"⚠️ Partial batch fill, inventory changed: {', '.join(filled)}")
+                await self._refresh_balance(exchange)
+            return None
+        
+        # Reconcile against the real balances once, after the whole batch
+        balance = await exchange.fetch_balance()
+        self.logger.info(f"✅ Batch filled - balances: USDT {balance.get('USDT', {}).get('free', 0):.2f}, "
+                         f"{opportunity.path[1]} {balance.get(opportunity.path[1], {}).get('free', 0):.8f}, "
+                         f"{opportunity.path[2]} {balance.get(opportunity.path[2], {}).get('free', 0):.8f}")
+        return received[2]
+    
+    def _report_ultra_fast_trade(self, opportunity: FastOpportunity, final_usdt: float,
+                                 execution_start: float) -> bool:
+        """Log the realised result of a completed trade; True if it made money"""
+        execution_time = (time.time() - execution_start) * 1000
+        
+        # Calculate actual profit
+        actual_profit = final_usdt - opportunity.trade_amount
+        actual_profit_pct = (actual_profit / opportunity.trade_amount) * 100
+        
+        self.logger.info(f"🎉 ULTRA-FAST TRADE COMPLETED:")
+        self.logger.info(f"   Initial: ${opportunity.trade_amount:.2f} USDT")
+        self.logger.info(f"   Final: ${final_usdt:.2f} USDT")
+        self.logger.info(f"   Actual Profit: ${actual_profit:.4f} ({actual_profit_pct:.4f}%)")
+        self.logger.info(f"   Execution Time: {execution_time:.0f}ms")
+        self.logger.info(f"   Total Time: {(time.time() - opportunity.detected_at)*1000:.0f}ms from detection")
+        
+        return actual_profit > 0
+    
     async def run(self, exchange_id: str = 'kucoin'):
         """Run the ultra-fast arbitrage bot"""
         if not await self.initialize_exchange(exchange_id):
@@ -439,8 +888,22 @@ class UltraFastArbitrageDetector:
             await self.ultra_fast_scan_and_execute(exchange_id)
         finally:
             # Cleanup
+            if self._ws_ticker_task:
+                self._ws_ticker_task.cancel()
+            if self._rtt_probe_task:
+                self._rtt_probe_task.cancel()
+            if self._balance_task:
+                self._balance_task.cancel()
+            for task in self._ws_book_tasks:
+                task.cancel()
+            self._cpu_pool.shutdown(wait=False)
+            if self._ws_exchange:
+                await self._ws_exchange.close()
             for exchange in self.exchanges.values():
                 await exchange.close()
+            # ccxt does not own the injected session, so close it here
+            if self._session and not self._session.closed:
+                await self._session.close()
             
             # Final stats
             success_rate = (self.successful_trades / max(self.trades_executed, 1)) * 100
@@ -461,7 +924,10 @@ async def main():
     print("3. Capture profits before prices move")
     print("=" * 50)
     
-    detector = UltraFastArbitrageDetector(min_profit_pct=0.4, max_trade_amount=20.0)
+    detector = UltraFastArbitrageDetector(
+        min_profit_pct=0.4, max_trade_amount=20.0,
+        batch_order_execution=os.getenv('BATCH_ORDER_EXECUTION', 'false').lower() == 'true'
+    )
     
     # Choose exchange
     print("\nChoose exchange:")
@@ -479,4 +945,5 @@ async def main():
         print("\n⚡ Ultra-fast bot stopped by user")
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
@@ -8,14 +8,111 @@ import asyncio
 import websockets
 import json
 import time
-from typing import Dict, List, Any, Set
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Set, Optional, Tuple, Union
 from datetime import datetime
 import logging
 from dataclasses import dataclass
+import numpy as np
+
+from utils.compat import DATACLASS_SLOTS, install_uvloop
+from utils.prices import parse_price
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson  # SIMD JSON decoding for the ~200 KB ticker frames
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 logger = logging.getLogger('USDTScanner')
 
-@dataclass
+
+def _parse_prices(values: List[Any]) -> np.ndarray:
+    """Feed price fields as float64, NaN where a field is malformed.
+
+    The batch goes through NumPy's converter in one call; only a batch that
+    actually contains a bad field is re-parsed field by field.
+    """
+    try:
+        return np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([parse_price(v) for v in values], dtype=np.float64)
+
+
+# Triangle table columns: USDT → curr1 leg, curr1 → curr2 cross leg, its kind, curr2 → USDT leg
+TRI_LEG1, TRI_CROSS, TRI_KIND, TRI_LEG3 = 0, 1, 2, 3
+# How the cross pair trades curr1 → curr2: sell curr1/curr2 at bid, or buy curr2/curr1 at ask
+CROSS_DIRECT, CROSS_INVERSE = 1, 2
+
+
+def _scan_kernel_numpy(rates, tri_rates, rows, min_pct, max_trade, total_costs, out_profit, out_final):
+    """Refresh out_profit/out_final for the USDT → curr1 → curr2 → USDT triangles in `rows`.
+
+    rates holds every symbol's bid (sell rate) followed by its 1/ask (buy rate), and each
+    tri_rates row picks the three leg rates, so a triangle is just their product: no
+    direct/inverse branch. Unpriced legs have rate 0, which makes the triangle NaN.
+    Returns how many of the refreshed triangles clear min_pct.
+    """
+    gross = rates[tri_rates[rows]].prod(axis=1)
+    pct = np.where(gross > 0, (gross - 1) * 100 - total_costs, np.nan)
+    out_final[rows] = max_trade * gross
+    out_profit[rows] = pct
+    return int(np.count_nonzero(pct >= min_pct))
+
+
+if NUMBA_AVAILABLE:
+    # fastmath minus nnan/ninf: unusable triangles are reported as NaN.
+    # nogil so the scan runs on the worker thread while the loop keeps draining the socket.
+    @njit(cache=True, parallel=True, nogil=True, fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+    def _scan_kernel(rates, tri_rates, rows, min_pct, max_trade, total_costs, out_profit, out_final):
+        hits = 0
+        for k in prange(rows.shape[0]):
+            t = rows[k]
+            gross = rates[tri_rates[t, 0]] * rates[tri_rates[t, 1]] * rates[tri_rates[t, 2]]
+            pct = (gross - 1) * 100 - total_costs
+            out_final[t] = max_trade * gross
+            out_profit[t] = pct if gross > 0 else np.nan
+            if gross > 0 and pct >= min_pct:
+                hits += 1
+        return hits
+else:
+    _scan_kernel = _scan_kernel_numpy
+
+# Shared price block: uint64 header [seq, symbol count], then rates (bid | 1/ask) and ask as float64.
+# seq is odd while a batch is being written; readers retry a copy taken across a change of seq.
+_SHM_HEADER = 2
+
+
+def _price_views(buf, n_sym: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(header, rates, ask) arrays over a shared price block"""
+    header = np.ndarray((_SHM_HEADER,), dtype=np.uint64, buffer=buf)
+    rates = np.ndarray((2 * n_sym,), dtype=np.float64, buffer=buf, offset=_SHM_HEADER * 8)
+    ask = np.ndarray((n_sym,), dtype=np.float64, buffer=buf, offset=(_SHM_HEADER + 2 * n_sym) * 8)
+    return header, rates, ask
+
+
+def attach_shared_prices(name: str) -> Tuple[shared_memory.SharedMemory, np.ndarray, np.ndarray, np.ndarray]:
+    """Map a running scanner's shared price block read-only: (shm, header, bid, ask).
+
+    bid/ask are indexed by the publishing scanner's symbol ids (its sym_idx); keep
+    `shm` referenced for as long as the arrays are in use.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    n_sym = int(np.ndarray((_SHM_HEADER,), dtype=np.uint64, buffer=shm.buf)[1])
+    header, rates, ask = _price_views(shm.buf, n_sym)
+    rates.flags.writeable = False
+    ask.flags.writeable = False
+    return shm, header, rates[:n_sym], ask
+
+
+@dataclass(**DATACLASS_SLOTS)
 class USDTOpportunity:
     """USDT triangular opportunity"""
     path: str
@@ -34,16 +131,65 @@ class USDTOpportunity:
 class USDTTriangleScanner:
     """Real-time USDT triangle scanner using WebSocket"""
     
-    def __init__(self, min_profit_pct: float = 0.1, max_trade_amount: float = 50.0):
+    # Fees (0.3%) plus slippage (0.1%) charged against every triangle
+    TOTAL_COSTS_PCT = 0.4
+    # Anything above this is a stale quote rather than a real edge
+    MAX_PROFIT_PCT = 3.0
+    # Opportunities kept per scan
+    TOP_N = 10
+    # Minimum seconds between scans; bursts coalesce, quiet periods still get scanned
+    SCAN_INTERVAL = 0.1
+    # Undecoded frames held between the sockets and the parser; the oldest is dropped when full
+    FRAME_QUEUE_SIZE = 10_000
+    # Binance: at most 1024 streams per connection and 5 incoming messages per second
+    WEBSOCKET_URL = "wss://stream.binance.com:9443/ws"
+    MAX_STREAMS_PER_CONNECTION = 1024
+    SUBSCRIBE_BATCH = 200
+    
+    def __init__(self, min_profit_pct: float = 0.1, max_trade_amount: float = 50.0,
+                 shared_prices_name: Optional[str] = None):
         self.min_profit_pct = min_profit_pct
         self.max_trade_amount = max_trade_amount
+        # Publish prices in a named shared memory block so other scanners can map them
+        self.shared_prices_name = shared_prices_name
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._shm_header: Optional[np.ndarray] = None
         
-        # Price data
-        self.prices: Dict[str, Dict[str, float]] = {}
+        # Price data as parallel bid/ask arrays indexed by symbol id. Ids below
+        # len(_currencies) are the <curr>USDT pairs (symbol id == currency id), the
+        # rest are cross pairs. _triangles holds one (T, 4) row of ids per triangle,
+        # int16 whenever every rate index fits (it does for Binance's ~2k pairs).
+        # bid is a view on the first half of _rates and _inv_ask on the second, so
+        # _tri_rates can address each leg's sell (bid) or buy (1/ask) rate directly.
         self.usdt_currencies: Set[str] = set()
+        self._currencies: List[str] = []
+        self._idx: Dict[str, int] = {}  # currency interning table; _currencies maps back
+        self.sym_idx: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._rates = np.zeros(0)
+        self.bid = self._rates[:0]
+        self._inv_ask = self._rates[0:]
+        self.ask = np.zeros(0)
+        self._triangles = np.zeros((0, 4), dtype=np.int16)
+        self._tri_rates = np.zeros((0, 3), dtype=np.int16)
+        self._profit = np.zeros(0)
+        self._final = np.zeros(0)
+        
+        # Currency ids whose USDT pair has been quoted, updated as quotes first arrive
+        self._valid_set: Set[int] = set()
+        self._valid_list: Tuple[int, ...] = ()
+        
+        # Scan throttling: prices changed since the last scan / when it ran (monotonic).
+        # _dirty_syms marks which symbols moved; _tri_by_sym[sym] lists the triangles using sym.
+        self._dirty = False
+        self._dirty_syms = np.zeros(0, dtype=bool)
+        self._tri_by_sym: List[np.ndarray] = []
+        self._last_scan = 0.0
+        # One worker: scans are sequential, the point is to keep the event loop free for the socket
+        self._scan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='usdt-scan')
         
-        # WebSocket
-        self.websocket = None
+        # WebSocket (one connection per shard of bookTicker streams)
+        self.websockets: List[Any] = []
         self.running = False
         
         # Opportunities
@@ -64,21 +210,67 @@ class USDTTriangleScanner:
                 async with session.get('https://api.binance.com/api/v3/exchangeInfo') as response:
                     if response.status == 200:
                         data = await response.json()
+                        trading = [s for s in data['symbols'] if s['status'] == 'TRADING']
                         
                         # Find all USDT pairs
-                        for symbol_info in data['symbols']:
-                            if (symbol_info['status'] == 'TRADING' and 
-                                symbol_info['quoteAsset'] == 'USDT'):
-                                
+                        usdt_pairs = {}
+                        for symbol_info in trading:
+                            if symbol_info['quoteAsset'] == 'USDT':
                                 base_asset = symbol_info['baseAsset']
                                 self.usdt_currencies.add(base_asset)
-                                
-                                # Initialize price tracking
-                                symbol = symbol_info['symbol']
-                                self.prices[symbol] = {'bid': 0, 'ask': 0}
+                                usdt_pairs[base_asset] = symbol_info['symbol']
+                        
+                        self._currencies = sorted(self.usdt_currencies)
+                        self._idx = {c: i for i, c in enumerate(self._currencies)}
+                        self._symbols = [usdt_pairs[c] for c in self._currencies]
+                        
+                        # Cross pairs between two USDT currencies close the triangle,
+                        # one each way: curr_i → curr_j sells it, curr_j → curr_i buys it
+                        legs: Dict[Tuple[int, int], Tuple[int, int]] = {}
+                        for symbol_info in trading:
+                            i = self._idx.get(symbol_info['baseAsset'])
+                            j = self._idx.get(symbol_info['quoteAsset'])
+                            if i is None or j is None:
+                                continue
+                            sym = len(self._symbols)
+                            self._symbols.append(symbol_info['symbol'])
+                            legs[(i, j)] = (sym, CROSS_DIRECT)
+                            legs.setdefault((j, i), (sym, CROSS_INVERSE))
+                        
+                        # Initialize price tracking
+                        self.sym_idx = {sym: i for i, sym in enumerate(self._symbols)}
+                        n_sym = len(self._symbols)
+                        id_dtype = np.int16 if 2 * n_sym <= np.iinfo(np.int16).max else np.int32
+                        self._rates = np.zeros(2 * n_sym, dtype=np.float64)
+                        self.ask = np.zeros(n_sym, dtype=np.float64)
+                        if self.shared_prices_name:
+                            self._create_shared_prices(n_sym)
+                        self.bid = self._rates[:n_sym]
+                        self._inv_ask = self._rates[n_sym:]
+                        self._triangles = np.array(
+                            [(i, sym, kind, j) for (i, j), (sym, kind) in sorted(legs.items())],
+                            dtype=id_dtype).reshape(-1, 4)
+                        # Buy leg 1 (1/ask), sell or buy the cross pair, sell leg 3 (bid)
+                        tri = self._triangles
+                        self._tri_rates = np.stack([
+                            n_sym + tri[:, TRI_LEG1],
+                            np.where(tri[:, TRI_KIND] == CROSS_DIRECT, tri[:, TRI_CROSS], n_sym + tri[:, TRI_CROSS]),
+                            tri[:, TRI_LEG3],
+                        ], axis=1).astype(id_dtype)
+                        self._profit = np.full(len(self._triangles), np.nan)
+                        self._final = np.zeros(len(self._triangles))
+                        
+                        # Symbol → triangles it is a leg of, for incremental rescans
+                        leg_syms = tri[:, [TRI_LEG1, TRI_CROSS, TRI_LEG3]].ravel()
+                        leg_rows = np.repeat(np.arange(len(tri), dtype=np.int32), 3)
+                        order = np.argsort(leg_syms, kind='stable')
+                        bounds = np.searchsorted(leg_syms[order], np.arange(n_sym + 1))
+                        self._tri_by_sym = [leg_rows[order[bounds[k]:bounds[k + 1]]] for k in range(n_sym)]
+                        self._dirty_syms = np.zeros(n_sym, dtype=bool)
+                        self._warm_up_kernel()
                         
                         logger.info(f"✅ Found {len(self.usdt_currencies)} USDT currencies")
-                        logger.info(f"📊 Tracking {len(self.prices)} price feeds")
+                        logger.info(f"📊 Tracking {len(self.sym_idx)} price feeds, {len(self._triangles)} triangles")
                         return True
                     else:
                         logger.error(f"Failed to get exchange info: {response.status}")
@@ -87,29 +279,77 @@ class USDTTriangleScanner:
             logger.error(f"Error initializing scanner: {e}")
             return False
     
+    def _create_shared_prices(self, n_sym: int):
+        """Move the price arrays into a new shared memory block (process-local if that fails)"""
+        try:
+            self._shm = shared_memory.SharedMemory(
+                name=self.shared_prices_name, create=True, size=(_SHM_HEADER + 3 * n_sym) * 8)
+        except (FileExistsError, OSError) as e:
+            logger.warning(f"⚠️ Shared prices '{self.shared_prices_name}' unavailable, keeping them local: {e}")
+            return
+        self._shm_header, self._rates, self.ask = _price_views(self._shm.buf, n_sym)
+        self._rates[:] = 0.0
+        self.ask[:] = 0.0
+        self._shm_header[:] = (0, n_sym)
+        logger.info(f"📡 Publishing prices in shared memory '{self.shared_prices_name}'")
+    
+    def _warm_up_kernel(self):
+        """Compile (or load the cached) scan kernel now so the first live scan doesn't pay for it"""
+        tri_rates = np.array([[3, 2, 1], [4, 5, 0]], dtype=self._tri_rates.dtype)
+        rows = np.arange(2, dtype=np.int32)
+        _scan_kernel(np.ones(6), tri_rates, rows, 0.0, 1.0, 0.0, np.zeros(2), np.zeros(2))
+    
     async def start_websocket_stream(self):
-        """Start Binance WebSocket stream for USDT pairs"""
-        websocket_url = "wss://stream.binance.com:9443/ws/!ticker@arr"
+        """Start Binance bookTicker streams for every tracked USDT and cross pair"""
+        streams = [f"{symbol.lower()}@bookTicker" for symbol in self._symbols]
+        shards = [streams[k:k + self.MAX_STREAMS_PER_CONNECTION]
+                  for k in range(0, len(streams), self.MAX_STREAMS_PER_CONNECTION)]
         
-        logger.info("🌐 Connecting to Binance WebSocket...")
+        logger.info(f"🌐 Connecting to Binance WebSocket ({len(streams)} streams, {len(shards)} connections)...")
         
+        # Parse and scan on their own task so a slow scan never stalls the socket reads
+        frames: asyncio.Queue = asyncio.Queue(maxsize=self.FRAME_QUEUE_SIZE)
+        consumer = asyncio.create_task(self._consume_frames(frames))
+        
+        try:
+            await asyncio.gather(*(self._stream_shard(shard, frames) for shard in shards))
+        finally:
+            consumer.cancel()
+            self.running = False
+            logger.info("WebSocket stream ended")
+    
+    async def _stream_shard(self, streams: List[str], frames: asyncio.Queue):
+        """Subscribe one connection to `streams` and feed its frames to the queue, reconnecting on failure"""
         max_retries = 5
         retry_count = 0
         
         while retry_count < max_retries:
             try:
-                async with websockets.connect(websocket_url) as websocket:
-                    self.websocket = websocket
+                # Frames are decoded as-is (orjson takes bytes or str); no deflate, no frame size cap,
+                # and a short receive queue so a slow consumer doesn't pile up stale tickers
+                async with websockets.connect(self.WEBSOCKET_URL, compression=None, max_size=None,
+                                              max_queue=32) as websocket:
+                    for k in range(0, len(streams), self.SUBSCRIBE_BATCH):
+                        await websocket.send(json.dumps({
+                            'method': 'SUBSCRIBE',
+                            'params': streams[k:k + self.SUBSCRIBE_BATCH],
+                            'id': k // self.SUBSCRIBE_BATCH + 1
+                        }))
+                        await asyncio.sleep(0.25)
+                    
+                    self.websockets.append(websocket)
                     self.running = True
-                    logger.info("✅ Connected to Binance WebSocket")
+                    logger.info(f"✅ Connected to Binance WebSocket ({len(streams)} streams)")
                     
                     retry_count = 0
                     
-                    async for message in websocket:
-                        try:
-                            await self._process_websocket_message(message)
-                        except Exception as e:
-                            logger.error(f"Error processing message: {e}")
+                    try:
+                        async for message in websocket:
+                            if frames.full():
+                                frames.get_nowait()  # overflow: drop the oldest update
+                            frames.put_nowait(message)
+                    finally:
+                        self.websockets.remove(websocket)
                             
             except Exception as e:
                 retry_count += 1
@@ -122,183 +362,198 @@ class USDTTriangleScanner:
                 else:
                     logger.error("Max WebSocket retry attempts reached")
                     break
-        
-        self.running = False
-        logger.info("WebSocket stream ended")
     
-    async def _process_websocket_message(self, message: str):
-        """Process WebSocket ticker data"""
+    async def _consume_frames(self, frames: asyncio.Queue):
+        """Decode queued WebSocket frames and scan, independently of the socket readers"""
+        while True:  # cancelled from start_websocket_stream() when the stream ends
+            # Take everything that queued up while the last batch was processed
+            messages = [await frames.get()]
+            while not frames.empty():
+                messages.append(frames.get_nowait())
+            try:
+                await self._process_websocket_messages(messages)
+            except Exception as e:
+                logger.error("Error processing message: %s", e)
+    
+    async def _process_websocket_messages(self, messages: List[Union[str, bytes]]):
+        """Process a batch of WebSocket bookTicker frames (one ticker per frame, or a list of them)"""
         try:
-            data = json.loads(message)
-            
-            if isinstance(data, list):
-                # Update prices for USDT pairs only
-                usdt_updates = 0
-                
-                for ticker in data:
+            # Collect raw quote strings for USDT and cross pairs only; subscription acks carry no symbol
+            idxs: List[int] = []
+            bid_strs: List[str] = []
+            ask_strs: List[str] = []
+            for message in messages:
+                data = json_loads(message)
+                if not isinstance(data, (list, dict)):
+                    continue
+                for ticker in (data if isinstance(data, list) else (data,)):
                     if isinstance(ticker, dict):
-                        symbol = ticker.get('s', '')
+                        i = self.sym_idx.get(ticker.get('s', ''))
+                        if i is None:
+                            continue
                         
-                        # Only process USDT pairs
-                        if symbol.endswith('USDT') and symbol in self.prices:
-                            bid_price = ticker.get('b', 0)
-                            ask_price = ticker.get('a', 0)
-                            
-                            if bid_price and ask_price:
-                                try:
-                                    self.prices[symbol]['bid'] = float(bid_price)
-                                    self.prices[symbol]['ask'] = float(ask_price)
-                                    usdt_updates += 1
-                                except (ValueError, TypeError):
-                                    continue
+                        bid_price = ticker.get('b', 0)
+                        ask_price = ticker.get('a', 0)
+                        if bid_price and ask_price:
+                            idxs.append(i)
+                            bid_strs.append(bid_price)
+                            ask_strs.append(ask_price)
+            
+            if idxs:
+                # One C-level conversion per batch instead of a float() call per quote
+                idx = np.fromiter(idxs, dtype=np.int32, count=len(idxs))
+                bids = _parse_prices(bid_strs)
+                asks = _parse_prices(ask_strs)
+                ok = (bids > 0) & (asks > 0) & np.isfinite(bids) & np.isfinite(asks)
+                idx, bids, asks = idx[ok], bids[ok], asks[ok]
                 
-                # Scan for opportunities if we have enough updates
-                if usdt_updates >= 50:  # Process when we have good data
-                    await self._scan_usdt_opportunities()
+                # USDT pairs quoted for the first time join the priced set
+                new = idx[(idx < len(self._currencies)) & (self.ask[idx] == 0)]
+                if len(new):
+                    self._valid_set.update(new.tolist())
+                    self._valid_list = tuple(sorted(self._valid_set))
+                
+                # Duplicate ids keep the last (newest) quote
+                header = self._shm_header
+                if header is not None:
+                    header[0] += np.uint64(1)  # odd: batch in progress
+                self.bid[idx] = bids
+                self.ask[idx] = asks
+                self._inv_ask[idx] = 1.0 / asks
+                if header is not None:
+                    header[0] += np.uint64(1)
+                self._dirty_syms[idx] = True
+                self._dirty = self._dirty or len(idx) > 0
+            
+            now = time.monotonic()
+            if self._dirty and now - self._last_scan >= self.SCAN_INTERVAL:
+                self._last_scan = now
+                self._dirty = False
+                await self._scan_usdt_opportunities()
                     
         except Exception as e:
-            logger.error(f"Error processing WebSocket data: {e}")
+            logger.error("Error processing WebSocket data: %s", e)
     
     async def _scan_usdt_opportunities(self):
         """Scan for USDT triangular opportunities"""
         try:
-            opportunities = []
-            
-            # Get list of currencies with valid prices
-            valid_currencies = []
-            for currency in self.usdt_currencies:
-                symbol = f"{currency}USDT"
-                if (symbol in self.prices and 
-                    self.prices[symbol]['bid'] > 0 and 
-                    self.prices[symbol]['ask'] > 0):
-                    valid_currencies.append(currency)
-            
-            # Build USDT triangles
-            for curr1 in valid_currencies:
-                for curr2 in valid_currencies:
-                    if curr1 != curr2:
-                        opportunity = self._calculate_usdt_triangle(curr1, curr2)
-                        if opportunity and opportunity.profit_pct >= self.min_profit_pct:
-                            opportunities.append(opportunity)
-                            self.opportunities_found += 1
-            
-            # Sort by profitability
-            opportunities.sort(key=lambda x: x.profit_pct, reverse=True)
-            
-            # Update current opportunities
-            self.current_opportunities = opportunities[:10]
-            
-            if opportunities:
-                logger.info(f"💎 Found {len(opportunities)} USDT opportunities!")
-                for i, opp in enumerate(opportunities[:3]):
-                    logger.info(f"   {i+1}. {opp}")
-                    
-        except Exception as e:
-            logger.error(f"Error scanning opportunities: {e}")
-    
-    def _calculate_usdt_triangle(self, curr1: str, curr2: str) -> Optional[USDTOpportunity]:
-        """Calculate USDT triangle: USDT → curr1 → curr2 → USDT"""
-        try:
-            # Required symbols
-            symbol1 = f"{curr1}USDT"  # USDT → curr1
-            symbol2 = f"{curr1}{curr2}"  # curr1 → curr2
-            symbol3 = f"{curr2}USDT"  # curr2 → USDT
+            # A triangle needs two priced USDT legs
+            if len(self._valid_list) < 2:
+                return
             
-            # Alternative if curr1→curr2 doesn't exist
-            alt_symbol2 = f"{curr2}{curr1}"
+            # Only triangles with a leg that moved since the last scan need repricing
+            moved = np.flatnonzero(self._dirty_syms)
+            if not len(moved):
+                return
+            self._dirty_syms[moved] = False
+            rows = np.unique(np.concatenate([self._tri_by_sym[k] for k in moved]))
             
-            # Check if all required prices exist
-            if (symbol1 not in self.prices or symbol3 not in self.prices or
-                (symbol2 not in self.prices and alt_symbol2 not in self.prices)):
-                return None
+            hits = await asyncio.get_running_loop().run_in_executor(
+                self._scan_pool, _scan_kernel,
+                self._rates, self._tri_rates, rows, self.min_profit_pct,
+                self.max_trade_amount, self.TOTAL_COSTS_PCT, self._profit, self._final
+            )
+            # Untouched triangles kept their old profits, so with nothing newly
+            # profitable and nothing held over there is nothing to rank
+            if not hits and not self.current_opportunities:
+                return
             
-            # Get prices
-            price1_data = self.prices[symbol1]
-            price3_data = self.prices[symbol3]
+            profit_pct = self._profit
+            valid = (profit_pct >= self.min_profit_pct) & (profit_pct <= self.MAX_PROFIT_PCT)
+            candidates = np.flatnonzero(valid)
+            self.opportunities_found += len(candidates)
             
-            if symbol2 in self.prices:
-                price2_data = self.prices[symbol2]
-                use_direct = True
-            else:
-                price2_data = self.prices[alt_symbol2]
-                use_direct = False
+            # Top-N by profit, materialized only for the survivors
+            top = candidates
+            if len(top) > self.TOP_N:
+                top = top[np.argpartition(-profit_pct[top], self.TOP_N)[:self.TOP_N]]
+            top = top[np.argsort(-profit_pct[top])]
             
-            # Validate prices
-            if not all(data['bid'] > 0 and data['ask'] > 0 
-                      for data in [price1_data, price2_data, price3_data]):
-                return None
+            timestamp = datetime.now()  # one scan, one instant
+            self.current_opportunities = [
+                self._calculate_usdt_triangle(t, float(profit_pct[t]), float(self._final[t]), timestamp)
+                for t in top
+            ]
             
-            # Calculate triangle
-            start_usdt = self.max_trade_amount
-            
-            # Step 1: USDT → curr1 (buy curr1 with USDT)
-            price1 = price1_data['ask']  # Buy at ask
-            amount_curr1 = start_usdt / price1
-            
-            # Step 2: curr1 → curr2
-            if use_direct:
-                # Direct: sell curr1 for curr2
-                price2 = price2_data['bid']  # Sell at bid
-                amount_curr2 = amount_curr1 * price2
-            else:
-                # Inverse: buy curr2 with curr1
-                price2 = price2_data['ask']  # Buy at ask
-                amount_curr2 = amount_curr1 / price2
-            
-            # Step 3: curr2 → USDT (sell curr2 for USDT)
-            price3 = price3_data['bid']  # Sell at bid
-            final_usdt = amount_curr2 * price3
-            
-            # Calculate profit
-            gross_profit = final_usdt - start_usdt
-            gross_profit_pct = (gross_profit / start_usdt) * 100
-            
-            # Apply costs (0.3% fees + 0.1% slippage)
-            total_costs_pct = 0.4
-            net_profit_pct = gross_profit_pct - total_costs_pct
-            net_profit_usd = start_usdt * (net_profit_pct / 100)
-            
-            # Only return profitable and realistic opportunities
-            if (net_profit_pct >= self.min_profit_pct and 
-                net_profit_pct <= 3.0 and  # Max 3% (realistic)
-                final_usdt > 0):
-                
-                path = f"USDT → {curr1} → {curr2} → USDT"
-                pairs = [symbol1, symbol2 if use_direct else alt_symbol2, symbol3]
-                
-                return USDTOpportunity(
-                    path=path,
-                    currency1=curr1,
-                    currency2=curr2,
-                    profit_pct=net_profit_pct,
-                    profit_usd=net_profit_usd,
-                    trade_amount=start_usdt,
-                    pairs=pairs,
-                    prices={
-                        'step1': price1,
-                        'step2': price2,
-                        'step3': price3,
-                        'final_amount': final_usdt
-                    },
-                    timestamp=datetime.now()
+            if len(candidates) and logger.isEnabledFor(logging.INFO):
+                # One record per scan; formatting only happens when INFO is on
+                top3 = self.current_opportunities[:3]
+                logger.info(
+                    "💎 Found %d USDT opportunities!" + "\n   %d. %s" * len(top3),
+                    len(candidates), *(x for i, opp in enumerate(top3) for x in (i + 1, opp))
                 )
-            
-            return None
-            
+                    
         except Exception as e:
-            logger.debug(f"Error calculating USDT triangle {curr1}-{curr2}: {e}")
-            return None
+            logger.error("Error scanning opportunities: %s", e)
+    
+    def _calculate_usdt_triangle(self, t: int, net_profit_pct: float, final_usdt: float,
+                                 timestamp: datetime) -> USDTOpportunity:
+        """Build the USDT triangle USDT → curr1 → curr2 → USDT for row t of the triangle table"""
+        i, sym, kind, j = self._triangles[t]
+        curr1 = self._currencies[i]
+        curr2 = self._currencies[j]
+        start_usdt = self.max_trade_amount
+        
+        # Pair names come from the symbol table built in initialize()
+        symbols = self._symbols
+        
+        # Step 1: USDT → curr1 (buy curr1 with USDT at ask)
+        price1 = float(self.ask[i])
+        
+        # Step 2: curr1 → curr2
+        if kind == CROSS_DIRECT:
+            # Direct: sell curr1 for curr2 at bid
+            price2 = float(self.bid[sym])
+        else:
+            # Inverse: buy curr2 with curr1 at ask
+            price2 = float(self.ask[sym])
+        
+        # Step 3: curr2 → USDT (sell curr2 for USDT at bid)
+        price3 = float(self.bid[j])
+        
+        return USDTOpportunity(
+            path=f"USDT → {curr1} → {curr2} → USDT",
+            currency1=curr1,
+            currency2=curr2,
+            profit_pct=net_profit_pct,
+            profit_usd=start_usdt * (net_profit_pct / 100),
+            trade_amount=start_usdt,
+            pairs=[symbols[i], symbols[sym], symbols[j]],
+            prices={
+                'step1': price1,
+                'step2': price2,
+                'step3': price3,
+                'final_amount': final_usdt
+            },
+            timestamp=timestamp
+        )
     
     def get_current_opportunities(self) -> List[USDTOpportunity]:
         """Get current opportunities"""
         return self.current_opportunities.copy()
     
+    def close(self):
+        """Stop the scan worker thread and release the shared price block"""
+        # A scan still running on the worker reads the block, so wait for it before unmapping
+        self._scan_pool.shutdown(wait=self._shm is not None)
+        if self._shm is not None:
+            # Views must be gone before the mapping can close
+            self._shm_header = None
+            self._rates = np.zeros(0)
+            self.bid = self._rates[:0]
+            self._inv_ask = self._rates[0:]
+            self.ask = np.zeros(0)
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get scanner statistics"""
         return {
             'running': self.running,
             'usdt_currencies': len(self.usdt_currencies),
-            'price_feeds': len(self.prices),
+            'priced_currencies': len(self._valid_list),
+            'price_feeds': len(self.sym_idx),
             'opportunities_found': self.opportunities_found,
             'current_opportunities': len(self.current_opportunities)
         }
@@ -317,8 +572,11 @@ async def main():
         logger.info("Scanner stopped by user")
     except Exception as e:
         logger.error(f"Scanner error: {e}")
+    finally:
+        scanner.close()
 
 if __name__ == "__main__":
     print("🔍 USDT Triangle Scanner")
     print("=" * 30)
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
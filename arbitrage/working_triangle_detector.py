@@ -5,14 +5,111 @@ Uses proven mathematical approach to find REAL profitable opportunities
 """
 
 import asyncio
+import sys
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 import logging
 from dataclasses import dataclass
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import ccxt.pro as ccxtpro  # WebSocket ticker streams (bundled with ccxt>=4)
+except ImportError:
+    ccxtpro = None
 
 logger = logging.getLogger('WorkingTriangleDetector')
 
+# High-volume triangular paths that are most likely to be profitable
+HIGH_VOLUME_TRIANGLES: List[Tuple[str, str, str]] = [
+    # Major stablecoin arbitrage (most common)
+    ('USDT', 'USDC', 'BTC'),
+    ('USDT', 'USDC', 'ETH'),
+    ('USDT', 'BUSD', 'BTC'),
+    ('USDT', 'BUSD', 'ETH'),
+
+    # Major crypto triangles
+    ('USDT', 'BTC', 'ETH'),
+    ('USDT', 'BTC', 'BNB'),
+    ('USDT', 'ETH', 'BNB'),
+
+    # High-volume altcoin triangles
+    ('USDT', 'BTC', 'ADA'),
+    ('USDT', 'ETH', 'ADA'),
+    ('USDT', 'BTC', 'SOL'),
+    ('USDT', 'ETH', 'SOL'),
+    ('USDT', 'BTC', 'DOT'),
+    ('USDT', 'ETH', 'DOT'),
+    ('USDT', 'BTC', 'LINK'),
+    ('USDT', 'ETH', 'LINK'),
+    ('USDT', 'BTC', 'MATIC'),
+    ('USDT', 'ETH', 'MATIC'),
+    ('USDT', 'BTC', 'AVAX'),
+    ('USDT', 'ETH', 'AVAX'),
+
+    # Exchange-specific triangles
+    ('USDT', 'KCS', 'BTC'),  # KuCoin
+    ('USDT', 'KCS', 'ETH'),  # KuCoin
+    ('USDT', 'BNB', 'ADA'),  # Binance
+    ('USDT', 'BNB', 'SOL'),  # Binance
+
+    # DeFi token triangles (higher volatility)
+    ('USDT', 'UNI', 'AAVE'),
+    ('USDT', 'SUSHI', 'CRV'),
+    ('USDT', 'COMP', 'MKR'),
+
+    # Layer 2 triangles
+    ('USDT', 'MATIC', 'ARB'),
+    ('USDT', 'MATIC', 'OP'),
+
+    # Meme coin triangles (high volatility = more arbitrage)
+    ('USDT', 'DOGE', 'SHIB'),
+    ('USDT', 'PEPE', 'FLOKI'),
+]
+
+def _compute_triangle_profits_numpy(i1, i2, i3, use_direct, asks, bids, start, cost):
+    """Net profit % and leg amounts for base → intermediate → quote → base triangles.
+
+    i1/i2/i3 index each triangle's legs into asks/bids; the second leg sells at the bid
+    where use_direct, else buys at the ask. Returns (net_pct, amt_inter, amt_quote, final).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amt_inter = start / asks[i1]
+        amt_quote = np.where(use_direct, amt_inter * bids[i2], amt_inter / asks[i2])
+        final = amt_quote * bids[i3]
+        net_pct = (final / start - 1) * 100 - cost
+    return net_pct, amt_inter, amt_quote, final
+
+
+if NUMBA_AVAILABLE:
+    # A few dozen triangles per exchange: a serial loop beats prange's thread fan-out here.
+    # error_model='numpy' so an unquoted (0) ask yields inf like the NumPy path, not ZeroDivisionError.
+    @njit(cache=True, nogil=True, error_model='numpy')
+    def compute_triangle_profits(i1, i2, i3, use_direct, asks, bids, start, cost):
+        n = i1.shape[0]
+        net_pct = np.empty(n)
+        amt_inter = np.empty(n)
+        amt_quote = np.empty(n)
+        final = np.empty(n)
+        for t in range(n):
+            amt_inter[t] = start / asks[i1[t]]
+            if use_direct[t]:
+                amt_quote[t] = amt_inter[t] * bids[i2[t]]
+            else:
+                amt_quote[t] = amt_inter[t] / asks[i2[t]]
+            final[t] = amt_quote[t] * bids[i3[t]]
+            net_pct[t] = (final[t] / start - 1) * 100 - cost
+        return net_pct, amt_inter, amt_quote, final
+else:
+    compute_triangle_profits = _compute_triangle_profits_numpy
+
+
 @dataclass
 class RealOpportunity:
     """Real triangular arbitrage opportunity with verified profitability"""
@@ -42,6 +139,30 @@ class WorkingTriangleDetector:
         self.ticker_cache = {}
         self.last_ticker_fetch = {}
         
+        # Live ticker streams: ticker_cache[exchange] is mutated in place by the stream task,
+        # _dirty[exchange] collects the symbols updated since the last scan
+        self._ticker_tasks: Dict[str, asyncio.Task] = {}
+        self._ws_exchanges: Dict[str, Any] = {}
+        self._dirty: Dict[str, Set[str]] = {}
+        # Last scan's opportunities per exchange, keyed by triangle spec index
+        self._last_results: Dict[str, Dict[int, RealOpportunity]] = {}
+        
+        # Triangle specs built once: (base, intermediate, quote, pair1, pair2, alt_pair2, pair3),
+        # pair strings interned so ticker lookups compare by identity
+        self._triangle_specs: List[Tuple[str, str, str, str, str, str, str]] = [
+            (base, intermediate, quote,
+             sys.intern(f"{intermediate}/{base}"),      # e.g., BTC/USDT
+             sys.intern(f"{intermediate}/{quote}"),     # e.g., BTC/ETH
+             sys.intern(f"{quote}/{intermediate}"),     # e.g., ETH/BTC
+             sys.intern(f"{quote}/{base}"))             # e.g., ETH/USDT
+            for base, intermediate, quote in HIGH_VOLUME_TRIANGLES
+        ]
+        # Reverse index for event-driven rescans: pair → specs that may trade it
+        self._pair_to_triangles: Dict[str, List[int]] = {}
+        for k, spec in enumerate(self._triangle_specs):
+            for pair in spec[3:]:
+                self._pair_to_triangles.setdefault(pair, []).append(k)
+        
         self.logger.info(f"🚀 Working Triangle Detector initialized")
         self.logger.info(f"   Min Profit: {min_profit_pct}%")
         self.logger.info(f"   Max Trade: ${max_trade_amount}")
@@ -50,34 +171,116 @@ class WorkingTriangleDetector:
         """Find REAL arbitrage opportunities using proven mathematical approach"""
         all_opportunities = []
         
-        for exchange_name, exchange in self.exchange_manager.exchanges.items():
-            try:
-                self.logger.info(f"🔍 Scanning {exchange_name.upper()} for REAL arbitrage opportunities...")
-                
-                # Get fresh ticker data
-                tickers = await self._get_fresh_tickers(exchange, exchange_name)
-                if not tickers:
-                    self.logger.warning(f"❌ No ticker data for {exchange_name}")
-                    continue
-                
-                self.logger.info(f"✅ Got {len(tickers)} tickers from {exchange_name}")
-                
-                # Find profitable triangular paths
-                opportunities = await self._scan_triangular_paths(exchange_name, tickers)
-                all_opportunities.extend(opportunities)
-                
-                self.logger.info(f"💎 Found {len(opportunities)} opportunities on {exchange_name}")
-                
-            except Exception as e:
-                self.logger.error(f"Error scanning {exchange_name}: {e}")
+        # Scan exchanges concurrently so one slow fetch_tickers() doesn't hold up the rest
+        exchanges = self.exchange_manager.exchanges
+        for exchange_name, exchange in exchanges.items():
+            self._start_ticker_stream(exchange_name, exchange)
+        results = await asyncio.gather(
+            *(self._scan_one_exchange(name, exchange) for name, exchange in exchanges.items()),
+            return_exceptions=True
+        )
+        for exchange_name, result in zip(exchanges, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error scanning {exchange_name}: {result}")
+            else:
+                all_opportunities.extend(result)
         
         # Sort by profitability
         all_opportunities.sort(key=lambda x: x.profit_percentage, reverse=True)
         
         return all_opportunities
     
+    async def _scan_one_exchange(self, exchange_name: str, exchange) -> List[RealOpportunity]:
+        """Fetch one exchange's tickers and scan its triangles"""
+        self.logger.info(f"🔍 Scanning {exchange_name.upper()} for REAL arbitrage opportunities...")
+        
+        # Get fresh ticker data
+        tickers = await self._get_fresh_tickers(exchange, exchange_name)
+        if not tickers:
+            self.logger.warning(f"❌ No ticker data for {exchange_name}")
+            return []
+        
+        self.logger.info(f"✅ Got {len(tickers)} tickers from {exchange_name}")
+        
+        # Find profitable triangular paths. On a live stream only triangles with a pair
+        # updated since the last scan are re-evaluated; the rest keep their last result.
+        if self._stream_live(exchange_name) and exchange_name in self._last_results:
+            dirty = self._dirty.get(exchange_name, set())
+            affected = set().union(*(self._pair_to_triangles[p] for p in dirty if p in self._pair_to_triangles))
+            dirty.clear()
+            results = self._last_results[exchange_name]
+            if affected:
+                for k in affected:
+                    results.pop(k, None)
+                results.update(await self._scan_triangular_paths(exchange_name, tickers, affected))
+        else:
+            self._dirty.get(exchange_name, set()).clear()
+            results = self._last_results[exchange_name] = await self._scan_triangular_paths(exchange_name, tickers)
+        opportunities = list(results.values())
+        
+        self.logger.info(f"💎 Found {len(opportunities)} opportunities on {exchange_name}")
+        return opportunities
+    
+    def _start_ticker_stream(self, exchange_name: str, exchange):
+        """Subscribe to the exchange's WebSocket tickers once; REST polling stays the fallback"""
+        if exchange_name in self._ticker_tasks or ccxtpro is None:
+            return
+        exchange_id = getattr(exchange, 'id', exchange_name)
+        if not hasattr(ccxtpro, exchange_id):
+            return
+        try:
+            ws_exchange = getattr(ccxtpro, exchange_id)({'enableRateLimit': True})
+            if not ws_exchange.has.get('watchTickers'):
+                return
+        except Exception as e:
+            self.logger.warning(f"⚠️ WebSocket tickers unavailable for {exchange_name}: {e}")
+            return
+        self._ws_exchanges[exchange_name] = ws_exchange
+        self._ticker_tasks[exchange_name] = asyncio.create_task(self._ticker_stream(exchange_name, ws_exchange))
+    
+    async def _ticker_stream(self, exchange_name: str, ws_exchange):
+        """Keep ticker_cache[exchange_name] current from the WebSocket ticker channel"""
+        try:
+            await ws_exchange.load_markets()
+        except Exception as e:
+            self.logger.warning(f"⚠️ WebSocket tickers unavailable for {exchange_name}, polling REST: {e}")
+            return
+        pairs = {pair for spec in self._triangle_specs for pair in spec[3:]}
+        symbols = sorted(pair for pair in pairs if pair in ws_exchange.markets)
+        self.logger.info(f"⚡ Streaming {len(symbols)} tickers from {exchange_name} over WebSocket")
+        
+        while True:  # cancelled from close()
+            try:
+                update = await ws_exchange.watch_tickers(symbols)
+                # Looked up each time: a REST fetch made before the first update may have replaced the dict
+                self.ticker_cache.setdefault(exchange_name, {}).update(update)
+                self._dirty.setdefault(exchange_name, set()).update(update.keys())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Ticker stream error on {exchange_name}: {e}")
+                await asyncio.sleep(1)
+    
+    def _stream_live(self, exchange_name: str) -> bool:
+        """True once the exchange's ticker stream is running and has delivered prices"""
+        task = self._ticker_tasks.get(exchange_name)
+        return task is not None and not task.done() and bool(self.ticker_cache.get(exchange_name))
+    
+    async def close(self):
+        """Stop the ticker streams and close their WebSocket connections"""
+        for task in self._ticker_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._ticker_tasks.values(), return_exceptions=True)
+        for ws_exchange in self._ws_exchanges.values():
+            await ws_exchange.close()
+        self._ticker_tasks.clear()
+        self._ws_exchanges.clear()
+    
     async def _get_fresh_tickers(self, exchange, exchange_name: str) -> Dict[str, Any]:
-        """Get fresh ticker data with caching"""
+        """Get fresh ticker data: the live stream when it is up, else REST with caching"""
+        if self._stream_live(exchange_name):
+            return self.ticker_cache[exchange_name]
+        
         current_time = time.time()
         last_fetch = self.last_ticker_fetch.get(exchange_name, 0)
         
@@ -100,220 +303,177 @@ class WorkingTriangleDetector:
         
         return {}
     
-    async def _scan_triangular_paths(self, exchange_name: str, tickers: Dict[str, Any]) -> List[RealOpportunity]:
-        """Scan for triangular arbitrage opportunities using mathematical approach"""
-        opportunities = []
+    async def _scan_triangular_paths(self, exchange_name: str, tickers: Dict[str, Any],
+                                     spec_ids: Optional[Set[int]] = None) -> Dict[int, RealOpportunity]:
+        """Scan for triangular arbitrage opportunities using mathematical approach.
         
-        # Define high-volume triangular paths that are most likely to be profitable
-        high_volume_triangles = [
-            # Major stablecoin arbitrage (most common)
-            ('USDT', 'USDC', 'BTC'),
-            ('USDT', 'USDC', 'ETH'),
-            ('USDT', 'BUSD', 'BTC'),
-            ('USDT', 'BUSD', 'ETH'),
-            
-            # Major crypto triangles
-            ('USDT', 'BTC', 'ETH'),
-            ('USDT', 'BTC', 'BNB'),
-            ('USDT', 'ETH', 'BNB'),
-            
-            # High-volume altcoin triangles
-            ('USDT', 'BTC', 'ADA'),
-            ('USDT', 'ETH', 'ADA'),
-            ('USDT', 'BTC', 'SOL'),
-            ('USDT', 'ETH', 'SOL'),
-            ('USDT', 'BTC', 'DOT'),
-            ('USDT', 'ETH', 'DOT'),
-            ('USDT', 'BTC', 'LINK'),
-            ('USDT', 'ETH', 'LINK'),
-            ('USDT', 'BTC', 'MATIC'),
-            ('USDT', 'ETH', 'MATIC'),
-            ('USDT', 'BTC', 'AVAX'),
-            ('USDT', 'ETH', 'AVAX'),
-            
-            # Exchange-specific triangles
-            ('USDT', 'KCS', 'BTC'),  # KuCoin
-            ('USDT', 'KCS', 'ETH'),  # KuCoin
-            ('USDT', 'BNB', 'ADA'),  # Binance
-            ('USDT', 'BNB', 'SOL'),  # Binance
-            
-            # DeFi token triangles (higher volatility)
-            ('USDT', 'UNI', 'AAVE'),
-            ('USDT', 'SUSHI', 'CRV'),
-            ('USDT', 'COMP', 'MKR'),
-            
-            # Layer 2 triangles
-            ('USDT', 'MATIC', 'ARB'),
-            ('USDT', 'MATIC', 'OP'),
-            
-            # Meme coin triangles (high volatility = more arbitrage)
-            ('USDT', 'DOGE', 'SHIB'),
-            ('USDT', 'PEPE', 'FLOKI'),
-        ]
+        Only the triangle specs in `spec_ids` are evaluated when given; returns the
+        opportunities found keyed by spec index.
+        """
+        opportunities = {}
         
-        self.logger.info(f"🔍 Testing {len(high_volume_triangles)} high-volume triangle patterns...")
+        specs = [(k, self._triangle_specs[k]) for k in sorted(spec_ids)] if spec_ids is not None \
+            else list(enumerate(self._triangle_specs))
+        self.logger.info(f"🔍 Testing {len(specs)} high-volume triangle patterns...")
         
-        for base, intermediate, quote in high_volume_triangles:
-            try:
-                opportunity = await self._calculate_precise_triangle_profit(
-                    exchange_name, tickers, base, intermediate, quote
-                )
-                
-                if opportunity:
-                    opportunities.append(opportunity)
-                    
-                    # Log all opportunities for debugging
-                    if opportunity.profit_percentage >= 0.4:
-                        self.logger.info(f"💚 PROFITABLE: {opportunity}")
-                    elif opportunity.profit_percentage >= 0:
-                        self.logger.info(f"🟡 LOW PROFIT: {opportunity}")
-                    elif opportunity.profit_percentage >= -0.5:
-                        self.logger.info(f"🟠 SMALL LOSS: {opportunity}")
-                    else:
-                        self.logger.info(f"🔴 LOSS: {opportunity}")
-                        
-            except Exception as e:
-                self.logger.debug(f"Error calculating {base}-{intermediate}-{quote}: {e}")
-        
-        return opportunities
-    
-    async def _calculate_precise_triangle_profit(self, exchange_name: str, tickers: Dict[str, Any], 
-                                               base: str, intermediate: str, quote: str) -> Optional[RealOpportunity]:
-        """Calculate precise triangular arbitrage profit with proper bid/ask spreads"""
-        try:
-            # Define the three required pairs
-            pair1 = f"{intermediate}/{base}"      # e.g., BTC/USDT
-            pair2 = f"{intermediate}/{quote}"     # e.g., BTC/ETH  
-            pair3 = f"{quote}/{base}"             # e.g., ETH/USDT
-            
-            # Try alternative pair2 direction
-            alt_pair2 = f"{quote}/{intermediate}" # e.g., ETH/BTC
-            
-            # Check if all pairs exist in ticker data
+        # Resolve each triangle's pairs against this exchange's listings
+        ids = []
+        paths = []
+        legs = []
+        use_direct = []
+        for k, (base, intermediate, quote, pair1, pair2, alt_pair2, pair3) in specs:
             if not (pair1 in tickers and pair3 in tickers):
-                return None
-            
-            # Get pair2 (try both directions)
+                continue
             if pair2 in tickers:
-                use_direct_pair2 = True
-                pair2_symbol = pair2
+                legs.append((pair1, pair2, pair3))
+                use_direct.append(True)
             elif alt_pair2 in tickers:
-                use_direct_pair2 = False
-                pair2_symbol = alt_pair2
+                legs.append((pair1, alt_pair2, pair3))
+                use_direct.append(False)
             else:
-                return None
-            
-            # Get ticker data
-            t1 = tickers[pair1]
-            t2 = tickers[pair2_symbol]
-            t3 = tickers[pair3]
-            
-            # Validate ticker data has proper bid/ask
-            if not all(t.get('bid') and t.get('ask') and t.get('bid') > 0 and t.get('ask') > 0 
-                      for t in [t1, t2, t3]):
-                return None
-            
-            # Validate spreads are reasonable (not more than 2%)
-            for pair_name, ticker in [(pair1, t1), (pair2_symbol, t2), (pair3, t3)]:
-                bid, ask = float(ticker['bid']), float(ticker['ask'])
-                if bid >= ask:  # Invalid spread
-                    return None
-                spread = (ask - bid) / bid
-                if spread > 0.02:  # More than 2% spread
-                    self.logger.debug(f"High spread on {pair_name}: {spread*100:.2f}%")
-                    return None
-            
-            # Calculate triangular arbitrage: base → intermediate → quote → base
-            start_amount = self.max_trade_amount
-            
-            # Step 1: base → intermediate (e.g., USDT → BTC)
-            # We're buying intermediate with base, so we pay the ask price
-            price1 = float(t1['ask'])
-            amount_intermediate = start_amount / price1
-            
-            # Step 2: intermediate → quote (e.g., BTC → ETH)
-            if use_direct_pair2:
-                # Direct pair: sell intermediate for quote at bid price
-                price2 = float(t2['bid'])
-                amount_quote = amount_intermediate * price2
-            else:
-                # Inverse pair: buy quote with intermediate at ask price
-                price2 = float(t2['ask'])
-                amount_quote = amount_intermediate / price2
-            
-            # Step 3: quote → base (e.g., ETH → USDT)
-            # We're selling quote for base, so we get the bid price
-            price3 = float(t3['bid'])
-            final_amount = amount_quote * price3
-            
-            # Calculate gross profit
-            gross_profit = final_amount - start_amount
-            gross_profit_pct = (gross_profit / start_amount) * 100
-            
-            # Apply realistic trading costs
-            trading_costs = self._get_realistic_trading_costs(exchange_name)
-            net_profit_pct = gross_profit_pct - trading_costs
-            net_profit_amount = start_amount * (net_profit_pct / 100)
-            
-            # Create detailed steps for execution
-            steps = [
-                {
-                    'step': 1,
-                    'action': f"Buy {amount_intermediate:.6f} {intermediate} with {start_amount:.2f} {base}",
-                    'pair': pair1,
-                    'side': 'buy',
-                    'quantity': start_amount,  # USDT amount to spend
-                    'price': price1,
-                    'expected_output': amount_intermediate
-                },
-                {
-                    'step': 2,
-                    'action': f"{'Sell' if use_direct_pair2 else 'Buy'} {amount_quote:.6f} {quote}",
-                    'pair': pair2_symbol,
-                    'side': 'sell' if use_direct_pair2 else 'buy',
-                    'quantity': amount_intermediate,
-                    'price': price2,
-                    'expected_output': amount_quote
-                },
-                {
-                    'step': 3,
-                    'action': f"Sell {amount_quote:.6f} {quote} for {final_amount:.2f} {base}",
-                    'pair': pair3,
-                    'side': 'sell',
-                    'quantity': amount_quote,
-                    'price': price3,
-                    'expected_output': final_amount
-                }
-            ]
-            
-            # Validate the opportunity is realistic
-            if (abs(net_profit_pct) <= 10.0 and  # Max 10% profit/loss (realistic)
-                final_amount > 0 and
-                amount_intermediate > 0 and
-                amount_quote > 0):
-                
-                return RealOpportunity(
-                    exchange=exchange_name,
-                    path=[base, intermediate, quote],
-                    pairs=[pair1, pair2_symbol, pair3],
-                    profit_percentage=net_profit_pct,
-                    profit_amount=net_profit_amount,
-                    trade_amount=start_amount,
-                    prices={
-                        'step1_price': price1,
-                        'step2_price': price2,
-                        'step3_price': price3,
-                        'final_amount': final_amount
-                    },
-                    steps=steps,
-                    is_executable=(net_profit_pct >= 0.4)  # Only profitable ones are executable
-                )
-            
-            return None
-            
-        except Exception as e:
-            self.logger.debug(f"Error calculating triangle {base}-{intermediate}-{quote}: {e}")
-            return None
+                continue
+            ids.append(k)
+            paths.append((base, intermediate, quote))
+        
+        if not legs:
+            return opportunities
+        
+        # One gather per leg instead of dict lookups and float() casts per triangle
+        symbol_idx, bids, asks = self._build_price_arrays(tickers, {p for pairs in legs for p in pairs})
+        idx = np.array([[symbol_idx[p] for p in pairs] for pairs in legs], dtype=np.intp)
+        i1, i2, i3 = idx[:, 0], idx[:, 1], idx[:, 2]
+        direct = np.array(use_direct, dtype=bool)
+        
+        # Every leg needs a proper book with a spread of at most 2%
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = (asks - bids) / bids
+        sane = (bids > 0) & (asks > bids) & (spread <= 0.02)
+        valid = sane[i1] & sane[i2] & sane[i3]
+        
+        # base → intermediate at ask, intermediate → quote (sell at bid / buy at ask), quote → base at bid
+        start_amount = self.max_trade_amount
+        trading_costs = self._get_realistic_trading_costs(exchange_name)
+        net_pct, _, _, final = compute_triangle_profits(
+            i1, i2, i3, direct, asks, bids, start_amount, trading_costs
+        )
+        
+        # Only realistic (within ±10%) results that clear the threshold become opportunities
+        valid &= (np.abs(net_pct) <= 10.0) & (final > 0)
+        survivors = np.nonzero(valid & (net_pct >= self.min_profit_pct))[0]
+        self.logger.info(f"📊 {int(valid.sum())} priced triangles, {len(survivors)} at or above {self.min_profit_pct}%")
+        
+        # Below-threshold triangles stay visible for debugging, straight from the profit array
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for t in np.nonzero(valid & (net_pct < self.min_profit_pct))[0]:
+                pct = float(net_pct[t])
+                tier = "🟡 LOW PROFIT" if pct >= 0 else "🟠 SMALL LOSS" if pct >= -0.5 else "🔴 LOSS"
+                self.logger.debug("%s: %s %s = %+.4f%%", tier, exchange_name, ' → '.join(paths[t]), pct)
+        
+        for t in survivors:
+            opportunity = self._calculate_precise_triangle_profit(
+                exchange_name, paths[t], legs[t], bool(direct[t]),
+                float(asks[i1[t]]), float(bids[i2[t]] if direct[t] else asks[i2[t]]), float(bids[i3[t]]),
+                trading_costs
+            )
+            opportunities[ids[t]] = opportunity
+            self.logger.info(f"💚 PROFITABLE: {opportunity}")
+        
+        return opportunities
+    
+    @staticmethod
+    def _build_price_arrays(tickers: Dict[str, Any], symbols) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+        """Bid/ask arrays for `symbols` plus the symbol → row map; missing quotes are 0"""
+        symbol_idx = {symbol: i for i, symbol in enumerate(symbols)}
+        bids = np.zeros(len(symbol_idx), dtype=np.float64)
+        asks = np.zeros(len(symbol_idx), dtype=np.float64)
+        for symbol, i in symbol_idx.items():
+            ticker = tickers[symbol]
+            bids[i] = float(ticker.get('bid') or 0)
+            asks[i] = float(ticker.get('ask') or 0)
+        return symbol_idx, bids, asks
+    
+    def _calculate_precise_triangle_profit(self, exchange_name: str, path: Tuple[str, str, str],
+                                         pairs: Tuple[str, str, str], use_direct_pair2: bool,
+                                         price1: float, price2: float, price3: float,
+                                         trading_costs: float) -> RealOpportunity:
+        """Build the opportunity for a triangle the vectorized scan found profitable"""
+        base, intermediate, quote = path
+        pair1, pair2_symbol, pair3 = pairs
+        
+        # Calculate triangular arbitrage: base → intermediate → quote → base
+        start_amount = self.max_trade_amount
+        
+        # Step 1: base → intermediate (e.g., USDT → BTC)
+        # We're buying intermediate with base, so we pay the ask price
+        amount_intermediate = start_amount / price1
+        
+        # Step 2: intermediate → quote (e.g., BTC → ETH)
+        if use_direct_pair2:
+            # Direct pair: sell intermediate for quote at bid price
+            amount_quote = amount_intermediate * price2
+        else:
+            # Inverse pair: buy quote with intermediate at ask price
+            amount_quote = amount_intermediate / price2
+        
+        # Step 3: quote → base (e.g., ETH → USDT)
+        # We're selling quote for base, so we get the bid price
+        final_amount = amount_quote * price3
+        
+        # Calculate gross profit
+        gross_profit = final_amount - start_amount
+        gross_profit_pct = (gross_profit / start_amount) * 100
+        
+        # Apply realistic trading costs
+        net_profit_pct = gross_profit_pct - trading_costs
+        net_profit_amount = start_amount * (net_profit_pct / 100)
+        
+        # Create detailed steps for execution
+        steps = [
+            {
+                'step': 1,
+                'action': f"Buy {amount_intermediate:.6f} {intermediate} with {start_amount:.2f} {base}",
+                'pair': pair1,
+                'side': 'buy',
+                'quantity': start_amount,  # USDT amount to spend
+                'price': price1,
+                'expected_output': amount_intermediate
+            },
+            {
+                'step': 2,
+                'action': f"{'Sell' if use_direct_pair2 else 'Buy'} {amount_quote:.6f} {quote}",
+                'pair': pair2_symbol,
+                'side': 'sell' if use_direct_pair2 else 'buy',
+                'quantity': amount_intermediate,
+                'price': price2,
+                'expected_output': amount_quote
+            },
+            {
+                'step': 3,
+                'action': f"Sell {amount_quote:.6f} {quote} for {final_amount:.2f} {base}",
+                'pair': pair3,
+                'side': 'sell',
+                'quantity': amount_quote,
+                'price': price3,
+                'expected_output': final_amount
+            }
+        ]
+        
+        return RealOpportunity(
+            exchange=exchange_name,
+            path=[base, intermediate, quote],
+            pairs=[pair1, pair2_symbol, pair3],
+            profit_percentage=net_profit_pct,
+            profit_amount=net_profit_amount,
+            trade_amount=start_amount,
+            prices={
+                'step1_price': price1,
+                'step2_price': price2,
+                'step3_price': price3,
+                'final_amount': final_amount
+            },
+            steps=steps,
+            is_executable=(net_profit_pct >= 0.4)  # Only profitable ones are executable
+        )
     
     def _get_realistic_trading_costs(self, exchange_name: str) -> float:
         """Get realistic trading costs for each exchange"""
@@ -338,12 +498,17 @@ class WorkingTriangleDetector:
         
         self.logger.info("🔍 Scanning for cross-exchange arbitrage opportunities...")
         
-        # Get tickers from all exchanges
-        exchange_tickers = {}
-        for exchange_name, exchange in self.exchange_manager.exchanges.items():
-            tickers = await self._get_fresh_tickers(exchange, exchange_name)
-            if tickers:
-                exchange_tickers[exchange_name] = tickers
+        # Get tickers from all exchanges concurrently
+        exchanges = self.exchange_manager.exchanges
+        fetched = await asyncio.gather(
+            *(self._get_fresh_tickers(exchange, name) for name, exchange in exchanges.items()),
+            return_exceptions=True
+        )
+        exchange_tickers = {
+            exchange_name: tickers
+            for exchange_name, tickers in zip(exchanges, fetched)
+            if tickers and not isinstance(tickers, BaseException)
+        }
         
         if len(exchange_tickers) < 2:
             return []
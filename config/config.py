@@ -56,6 +56,7 @@ class Config:
     REQUIRE_USDT_ANCHOR: bool = True
     MAX_TRIANGLES: int = int(os.getenv('MAX_TRIANGLES', '300'))  # Reduced for better performance
     MIN_VOLUME_USDT: float = float(os.getenv('MIN_VOLUME_USDT', '0'))  # optional filter if volumes available
+    USE_BELLMAN_FORD: bool = os.getenv('USE_BELLMAN_FORD', 'false').lower() == 'true'  # negative-cycle scan instead of triangle enumeration
     
     # Trading pair validation
     VALIDATE_PAIRS_BEFORE_EXECUTION: bool = True  # Always validate pairs exist
@@ -74,6 +75,10 @@ class Config:
     DRY_RUN: bool = False        # 🔴 NO DRY RUN - REAL ORDERS ONLY
     BACKTESTING_MODE: bool = os.getenv('BACKTESTING_MODE', 'false').lower() == 'false'
     
+    # Event loop / process placement
+    USE_UVLOOP: bool = os.getenv('USE_UVLOOP', 'true').lower() == 'true'  # used only if uvloop is installed
+    EXECUTOR_CPU: int = int(os.getenv('EXECUTOR_CPU', '-1'))  # pin the bot to this core on Linux (-1 = no pinning)
+    
     # Scanning Configuration - Show ALL opportunities
     SCAN_ALL_OPPORTUNITIES: bool = True   # Scan all market opportunities
     IGNORE_BALANCE_CHECK: bool = True     # Don't check balance when scanning
@@ -189,6 +189,10 @@ class MultiExchangeManager:
         """Get specific exchange instance."""
         return self.exchanges.get(exchange_id)
 
+    def first_available(self) -> Optional[str]:
+        """Get the first connected exchange ID without copying the exchange dict."""
+        return self.connected_exchanges[0] if self.connected_exchanges else None
+
     def get_connected_exchanges(self) -> List[str]:
         """Get list of connected exchange IDs."""
         return self.connected_exchanges.copy()
@@ -19,16 +19,42 @@ except Exception:
 # -----------------------------------------------
 
 import ccxt.async_support as ccxt
+import aiohttp
 import asyncio
+import operator
+import socket
 import time
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple, Callable
 from exchanges.base_exchange import BaseExchange
 from utils.logger import setup_logger
 
+try:
+    import ccxt.pro as ccxtpro  # WebSocket user-data streams (bundled with ccxt>=4)
+except ImportError:
+    ccxtpro = None
+
+# ccxt guarantees these keys on unified order structures - one C-level fetch instead of .get() cascades
+_ORDER_FIELDS = operator.itemgetter('id', 'filled', 'average', 'cost', 'fee', 'status')
+
+
+def _keepalive_socket(addr_info) -> socket.socket:
+    """Socket factory enabling TCP keepalive so idle pooled connections stay warm."""
+    family, sock_type, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=sock_type, proto=proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+    return sock
+
 
 class UnifiedExchange(BaseExchange):
     """Unified exchange implementation using ccxt with normalization."""
 
+    FILL_WS_WAIT = 0.75        # seconds to wait for a WebSocket fill before polling REST
+    EARLY_FILL_BUFFER = 256    # order updates kept for waiters that have not registered yet
+
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.exchange_id = config['exchange_id']
@@ -52,6 +78,18 @@ class UnifiedExchange(BaseExchange):
         self.server_time_offset = 0
         self.last_time_sync = 0
         
+        # WebSocket fill confirmation: futures for orders being waited on, plus final states that
+        # arrive before their waiter registers (bounded; oldest unclaimed entries are evicted)
+        self._ccxt_class_name: Optional[str] = None
+        self._ccxt_config: Dict[str, Any] = {}
+        self._ws_exchange = None
+        self._fill_watcher_task: Optional[asyncio.Task] = None
+        self._pending_fills: Dict[str, asyncio.Future] = {}
+        self._early_fills: 'OrderedDict[str, Optional[Dict[str, Any]]]' = OrderedDict()
+        
+        # Long-lived HTTP session shared by every REST call (reuses TCP+TLS)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
         # FORCE REAL TRADING ONLY
         self.logger.info(f"🔴 LIVE TRADING MODE ENABLED - REAL MONEY TRADES ON {self.exchange_id.upper()}")
         self.logger.info(f"✅ READY: Real-money trading enabled with enforced profit/amount limits.")
@@ -65,15 +103,17 @@ class UnifiedExchange(BaseExchange):
 
             # Handle Gate.io special case
             if self.exchange_id == 'gate':
-                exchange_class = getattr(ccxt, 'gateio')
+                self._ccxt_class_name = 'gateio'
             else:
-                exchange_class = getattr(ccxt, self.exchange_id)
+                self._ccxt_class_name = self.exchange_id
+            exchange_class = getattr(ccxt, self._ccxt_class_name)
                 
             exchange_config = {
                 'enableRateLimit': True,
                 'options': {'defaultType': 'spot'},
                 'timeout': 10000,
-                'rateLimit': 1200
+                'rateLimit': 1200,
+                'session': self._create_http_session()
             }
 
             # Check for API credentials
@@ -107,6 +147,7 @@ class UnifiedExchange(BaseExchange):
                 self.logger.info("🕒 KuCoin timestamp synchronization enabled")
 
             self.exchange = exchange_class(exchange_config)
+            self._ccxt_config = exchange_config
             
             # Synchronize server time for KuCoin
             if self.exchange_id == 'kucoin':
@@ -150,6 +191,8 @@ class UnifiedExchange(BaseExchange):
             self.logger.info(f"📊 {self.exchange_id} trading pairs: {total_pairs} total, {usdt_pairs} USDT pairs, {btc_pairs} BTC pairs")
 
             self.is_connected = True
+            # Subscribe to order updates now so the stream is live before the first trade
+            await self.start_fill_watcher()
             self.logger.info(f"✅ Connected to {self.exchange_id} - REAL ACCOUNT ACCESS")
             self.logger.info(f"{self.exchange_id}: {len(self.trading_pairs)} trading pairs")
             return True
@@ -158,6 +201,20 @@ class UnifiedExchange(BaseExchange):
             self.logger.error("   Check your API credentials in .env file")
             return False
 
+    def _create_http_session(self) -> aiohttp.ClientSession:
+        """Create the pooled keep-alive session handed to ccxt."""
+        if self._session and not self._session.closed:
+            return self._session
+        connector_args = dict(limit=32, limit_per_host=8, keepalive_timeout=85,
+                              ttl_dns_cache=300, enable_cleanup_closed=True)
+        try:
+            connector = aiohttp.TCPConnector(socket_factory=_keepalive_socket, **connector_args)
+        except TypeError:
+            # aiohttp < 3.11 has no socket_factory - pooling still applies
+            connector = aiohttp.TCPConnector(**connector_args)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
     async def _synchronize_kucoin_time(self):
         """Synchronize time with KuCoin server to prevent timestamp errors"""
         try:
@@ -261,8 +318,13 @@ class UnifiedExchange(BaseExchange):
 
     async def disconnect(self) -> None:
         try:
+            await self.stop_fill_watcher()
             if self.exchange:
                 await self.exchange.close()
+            # ccxt does not own the injected session, so close it here
+            if self._session and not self._session.closed:
+                await self._session.close()
+            self._session = None
             self.is_connected = False
             self.logger.info(f"Disconnected from {self.exchange_id}")
         except Exception as e:
@@ -350,6 +412,23 @@ class UnifiedExchange(BaseExchange):
             return {'error': f'Only market orders supported, got: {order_type}'}
         return await self.place_market_order(symbol, side, quantity)
 
+    def _market_order_request(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        """Build create_order arguments; market BUY qty is the quote amount to spend."""
+        params: Dict[str, Any] = {}
+        amount: Optional[float] = qty
+        if self.exchange_id == 'gate' and side.lower() == 'buy':
+            # Gate.io takes the USDT amount to spend as the amount of a market buy
+            params = {'createMarketBuyOrderRequiresPrice': False}
+        elif self.exchange_id == 'kucoin':
+            if side.lower() == 'buy':
+                # KuCoin market buys use 'funds' (quote amount) instead of amount
+                amount = None
+                params = {'funds': f"{qty:.2f}"}
+            else:
+                params = {'size': f"{qty:.8f}"}
+        return {'symbol': symbol, 'type': 'market', 'side': side,
+                'amount': amount, 'price': None, 'params': params}
+
     async def place_market_order(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
         """Execute REAL market order on exchange that will appear in your account."""
         try:
@@ -367,54 +446,7 @@ class UnifiedExchange(BaseExchange):
                 raise ValueError(f"Invalid order parameters: symbol={symbol}, side={side}, qty={qty}")
             
             # LIGHTNING MODE: Direct execution
-            
-            # Gate.io specific order handling
-            if self.exchange_id == 'gate':
-                # Gate.io requires special handling for market buy orders
-                if side.lower() == 'buy':
-                    # For market BUY orders, Gate.io needs the USDT amount to spend (quote quantity)
-                    # Set the option to use quote quantity for market buy orders
-                    # Use Gate.io specific parameters for market buy
-                    order = await self.exchange.create_order(
-                        symbol=symbol,
-                        type='market',
-                        side='buy',
-                        amount=qty,  # This is the USDT amount to spend
-                        price=None,
-                        params={'createMarketBuyOrderRequiresPrice': False}
-                    )
-                else:
-                    # For market SELL orders, use standard format
-                    order = await self.exchange.create_market_order(symbol, side, qty)
-            elif self.exchange_id == 'kucoin':
-                # CCXT will automatically handle timestamp with adjustForTimeDifference
-                if side.lower() == 'buy':
-                    # INSTANT: Direct KuCoin buy order format
-                    order = await self.exchange.create_order(
-                        symbol=symbol,
-                        type='market',
-                        side='buy',
-                        amount=None,  # Don't specify amount for market buy
-                        price=None,
-                        params={
-                            'funds': f"{qty:.2f}"  # Use 'funds' for USDT amount to spend
-                        }
-                    )
-                else:
-                    # INSTANT: Direct KuCoin sell order format
-                    order = await self.exchange.create_order(
-                        symbol=symbol,
-                        type='market',
-                        side='sell',
-                        amount=qty,
-                        price=None,
-                        params={
-                            'size': f"{qty:.8f}"  # Proper formatting for sell quantity
-                        }
-                    )
-            else:
-                # Standard order for other exchanges
-                order = await self.exchange.create_market_order(symbol, side, qty)
+            order = await self.exchange.create_order(**self._market_order_request(symbol, side, qty))
             
             if not order:
                 return {
@@ -452,55 +484,7 @@ class UnifiedExchange(BaseExchange):
                     'raw_order': order
                 }
             
-            # Extract final order details after completion
-            status = order.get('status', 'Unknown')
-            filled_qty = float(order.get('filled', 0) or 0)
-            avg_price = float(order.get('average', 0) or order.get('price', 0) or 0)
-            total_cost = float(order.get('cost', 0) or 0)
-            
-            # Extract fee information
-            fee_info = order.get('fee', {})
-            fee_cost = 0
-            fee_currency = 'Unknown'
-            
-            if fee_info and isinstance(fee_info, dict):
-                fee_cost = float(fee_info.get('cost', 0) or 0)
-                fee_currency = fee_info.get('currency', 'Unknown')
-            
-            # LIGHTNING SPEED: Minimal logging
-            self.logger.info(f"⚡ {order_id}: {filled_qty:.8f} @ {avg_price:.8f} = {total_cost:.8f}")
-            
-            # Verify order was executed successfully
-            if status in ['closed', 'filled'] and filled_qty > 0:
-                self.logger.debug(f"⚡ SUCCESS: {order_id}")
-                
-                # Return success with all details
-                return {
-                    'success': True,
-                    'id': order_id,
-                    'status': status,
-                    'filled': filled_qty,
-                    'average': avg_price,
-                    'cost': total_cost,
-                    'fee': fee_info,
-                    'symbol': symbol,
-                    'side': side,
-                    'amount': qty,
-                    'timestamp': order.get('timestamp'),
-                    'datetime': order.get('datetime'),
-                    'raw_order': order
-                }
-            else:
-                # Order not filled or failed
-                error_msg = f"Order not executed: status={status}, filled={filled_qty}"
-                self.logger.error(f"❌ ORDER FAILED: {error_msg}")
-                return {
-                    'success': False,
-                    'status': 'failed',
-                    'error': error_msg,
-                    'id': order_id,
-                    'raw_order': order
-                }
+            return self._build_order_result(order, symbol, side, qty)
             
         except Exception as e:
             error_msg = f"{self.exchange_id} order execution failed: {str(e)}"
@@ -570,6 +554,96 @@ class UnifiedExchange(BaseExchange):
                 'exception_type': type(e).__name__
             }
     
+    def _build_order_result(self, order: Dict[str, Any], symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        """Normalize a completed ccxt order into the executor's result dict."""
+        try:
+            order_id, filled, average, cost, fee_info, status = _ORDER_FIELDS(order)
+        except KeyError as e:
+            self.logger.error(f"❌ ORDER FAILED: malformed order response, missing {e}")
+            return {
+                'success': False,
+                'status': 'failed',
+                'error': f"Malformed order response: missing {e}",
+                'id': order.get('id', 'Unknown'),
+                'raw_order': order
+            }
+        
+        # Extract final order details after completion
+        filled_qty = float(filled or 0)
+        avg_price = float(average or order.get('price') or 0)
+        total_cost = float(cost or 0)
+        
+        # LIGHTNING SPEED: Minimal logging
+        self.logger.info("⚡ %s: %.8f @ %.8f = %.8f", order_id, filled_qty, avg_price, total_cost)
+        
+        # Verify order was executed successfully
+        if status in ['closed', 'filled'] and filled_qty > 0:
+            self.logger.debug("⚡ SUCCESS: %s", order_id)
+            
+            # Return success with all details
+            return {
+                'success': True,
+                'id': order_id,
+                'status': status,
+                'filled': filled_qty,
+                'average': avg_price,
+                'cost': total_cost,
+                'fee': fee_info,
+                'symbol': symbol,
+                'side': side,
+                'amount': qty,
+                'timestamp': order.get('timestamp'),
+                'datetime': order.get('datetime'),
+                'raw_order': order
+            }
+        else:
+            # Order not filled or failed
+            error_msg = f"Order not executed: status={status}, filled={filled_qty}"
+            self.logger.error(f"❌ ORDER FAILED: {error_msg}")
+            return {
+                'success': False,
+                'status': 'failed',
+                'error': error_msg,
+                'id': order_id,
+                'raw_order': order
+            }
+
+    def supports_batch_orders(self) -> bool:
+        """Check whether the exchange accepts several orders in one request."""
+        return bool(self.exchange and self.exchange.has.get('createOrders'))
+
+    async def place_batch_market_orders(self, orders: List[Tuple[str, str, float]]) -> List[Dict[str, Any]]:
+        """Submit (symbol, side, qty) market orders in a single HTTP call and wait for all fills.
+        
+        qty follows place_market_order: quote amount to spend for BUY, base amount for SELL.
+        """
+        try:
+            if self.exchange_id == 'kucoin':
+                orders = [(symbol, side, await self._round_to_kucoin_precision(symbol, qty))
+                          for symbol, side, qty in orders]
+            placed = await self.exchange.create_orders([
+                self._market_order_request(symbol, side, qty)
+                for symbol, side, qty in orders
+            ])
+        except Exception as e:
+            error_msg = f"{self.exchange_id} batch order failed: {str(e)}"
+            self.logger.error(f"❌ ERROR: {error_msg}")
+            return [{'success': False, 'status': 'failed', 'error': error_msg} for _ in orders]
+
+        async def _complete(placed_order: Dict[str, Any], symbol: str, side: str, qty: float) -> Dict[str, Any]:
+            order_id = placed_order.get('id') if placed_order else None
+            if not order_id:
+                return {'success': False, 'status': 'failed', 'error': 'No valid order ID received', 'raw_order': placed_order}
+            final_order = await self._wait_for_order_completion_lightning(order_id, symbol, timeout_seconds=8)
+            if not final_order:
+                return {'success': False, 'status': 'timeout', 'error': 'Order timeout after 8 seconds', 'id': order_id}
+            return self._build_order_result(final_order, symbol, side, qty)
+
+        return list(await asyncio.gather(*(
+            _complete(placed_order, symbol, side, qty)
+            for placed_order, (symbol, side, qty) in zip(placed, orders)
+        )))
+
     async def _wait_for_order_completion_instant(self, order_id: str, symbol: str, timeout_seconds: int = 5) -> Optional[Dict[str, Any]]:
         """INSTANT order completion with 5ms checking for maximum speed."""
         try:
@@ -609,9 +683,85 @@ class UnifiedExchange(BaseExchange):
             return None
 
     async def _wait_for_order_completion_lightning(self, order_id: str, symbol: str, timeout_seconds: int = 8) -> Optional[Dict[str, Any]]:
-        """Lightning order completion - alias for instant completion."""
+        """Lightning order completion - WebSocket fill if streaming, REST polling otherwise."""
+        if self._fill_watcher_task and not self._fill_watcher_task.done():
+            if order_id in self._early_fills:
+                return self._early_fills.pop(order_id)
+            future = asyncio.get_running_loop().create_future()
+            self._pending_fills[order_id] = future
+            try:
+                return await asyncio.wait_for(future, timeout=self.FILL_WS_WAIT)
+            except asyncio.TimeoutError:
+                pass  # WS has not reported the fill yet - fall back to the full REST budget
+            finally:
+                self._pending_fills.pop(order_id, None)
         return await self._wait_for_order_completion_instant(order_id, symbol, timeout_seconds)
 
+    async def start_fill_watcher(self) -> bool:
+        """Start the user-data WebSocket stream used to confirm order fills."""
+        if self._fill_watcher_task and not self._fill_watcher_task.done():
+            return True
+        if ccxtpro is None or not self._ccxt_class_name or not hasattr(ccxtpro, self._ccxt_class_name):
+            return False
+        try:
+            ws_config = {k: v for k, v in self._ccxt_config.items() if k != 'session'}
+            self._ws_exchange = getattr(ccxtpro, self._ccxt_class_name)(ws_config)
+            if self.exchange_id == 'kucoin' and hasattr(self._ws_exchange, 'options'):
+                self._ws_exchange.options['timeDifference'] = self.server_time_offset
+            self._fill_watcher_task = asyncio.create_task(
+                self._watch_order_fills(), name=f"fills_{self.exchange_id}"
+            )
+            self.logger.info(f"⚡ WebSocket fill confirmation enabled for {self.exchange_id}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not start fill watcher for {self.exchange_id}: {e}")
+            self._ws_exchange = None
+            return False
+
+    async def stop_fill_watcher(self) -> None:
+        """Stop the fill stream; registered waiters fall back to REST polling."""
+        if self._fill_watcher_task:
+            self._fill_watcher_task.cancel()
+            self._fill_watcher_task = None
+        if self._ws_exchange:
+            try:
+                await self._ws_exchange.close()
+            except Exception:
+                pass
+            self._ws_exchange = None
+        self._early_fills.clear()
+
+    async def _watch_order_fills(self) -> None:
+        """Resolve pending fill futures from watch_orders updates."""
+        while self.is_connected:
+            try:
+                orders = await self._ws_exchange.watch_orders()
+                for order in orders:
+                    order_id = order.get('id')
+                    status = order.get('status')
+                    if not order_id:
+                        continue
+                    if status in ['closed', 'filled'] and float(order.get('filled') or 0) > 0:
+                        result = order
+                    elif status in ['canceled', 'cancelled', 'rejected']:
+                        result = None
+                    else:
+                        continue
+                    future = self._pending_fills.get(order_id)
+                    if future is not None:
+                        if not future.done():
+                            future.set_result(result)
+                        continue
+                    # No waiter yet (the create response may still be in flight): keep it to be claimed
+                    self._early_fills[order_id] = result
+                    while len(self._early_fills) > self.EARLY_FILL_BUFFER:
+                        self._early_fills.popitem(last=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ Fill stream error on {self.exchange_id}: {e}")
+                await asyncio.sleep(1)
+
     async def _round_to_kucoin_precision(self, symbol: str, quantity: float) -> float:
         """Round quantity to KuCoin's required decimal precision"""
         try:
@@ -645,7 +795,7 @@ class UnifiedExchange(BaseExchange):
             if rounded_qty < 0.0001:
                 rounded_qty = 0.0001
             
-            self.logger.info(f"🔧 KuCoin precision: {symbol} {quantity:.8f} → {rounded_qty:.8f} ({precision} decimals)")
+            self.logger.info("🔧 KuCoin precision: %s %.8f → %.8f (%d decimals)", symbol, quantity, rounded_qty, precision)
             return rounded_qty
             
         except Exception as e:
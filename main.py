@@ -1,3 +1,4 @@
+import os
 import sys
 import asyncio
 import signal
@@ -7,25 +8,8 @@ from exchanges.unified_exchange import UnifiedExchange
 from arbitrage.triangle_detector import TriangleDetector
 from arbitrage.trade_executor import TradeExecutor
 from utils.logger import setup_logger
-
-def safe_unicode_text(text: str) -> str:
-    """Convert Unicode symbols to Windows-safe equivalents."""
-    if sys.platform.startswith('win'):
-        replacements = {
-            '→': '->',
-            '✅': '[OK]',
-            '❌': '[FAIL]',
-            '🔁': '[RETRY]',
-            '💰': '$',
-            '📊': '[STATS]',
-            '🎯': '[TARGET]',
-            '⚠️': '[WARN]',
-            '🚀': '[START]',
-            '🔺': '[BOT]'
-        }
-        for unicode_char, ascii_equiv in replacements.items():
-            text = text.replace(unicode_char, ascii_equiv)
-    return text
+from utils.compat import install_uvloop
+from models.arbitrage_opportunity import safe_unicode_text
 
 class TriangularArbitrageBot:
     """Main triangular arbitrage bot."""
@@ -80,7 +64,8 @@ class TriangularArbitrageBot:
             detector_config = {
                 'min_profit_percentage': Config.MIN_PROFIT_PERCENTAGE,
                 'max_trade_amount': Config.MAX_TRADE_AMOUNT,
-                'max_slippage_percentage': Config.MAX_SLIPPAGE_PERCENTAGE
+                'max_slippage_percentage': Config.MAX_SLIPPAGE_PERCENTAGE,
+                'use_bellman_ford': Config.USE_BELLMAN_FORD
             }
             
             self.detector = TriangleDetector(self.exchange, detector_config)
@@ -89,7 +74,8 @@ class TriangularArbitrageBot:
             # Initialize executor
             executor_config = {
                 'enable_manual_confirmation': Config.ENABLE_MANUAL_CONFIRMATION,
-                'order_timeout_seconds': Config.ORDER_TIMEOUT_SECONDS
+                'order_timeout_seconds': Config.ORDER_TIMEOUT_SECONDS,
+                'max_trade_amount': Config.MAX_TRADE_AMOUNT
             }
             
             self.executor = TradeExecutor(self.exchange, executor_config)
@@ -210,6 +196,9 @@ class TriangularArbitrageBot:
         self.logger.info("Shutting down bot...")
         self.running = False
         
+        if self.detector:
+            self.detector.close()
+        
         if self.exchange:
             await self.exchange.disconnect()
         
@@ -237,6 +226,17 @@ async def main():
     finally:
         await bot.cleanup()
 
+def configure_runtime() -> None:
+    """Install uvloop and pin the process to a core when configured."""
+    if Config.USE_UVLOOP:
+        install_uvloop()
+    
+    if Config.EXECUTOR_CPU >= 0 and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {Config.EXECUTOR_CPU})
+        except OSError as e:
+            print(f"    WARNING: Could not pin to CPU {Config.EXECUTOR_CPU}: {e}")
+
 if __name__ == "__main__":
     startup_text = safe_unicode_text("""
     [BOT] Triangular Arbitrage Bot
@@ -254,6 +254,8 @@ if __name__ == "__main__":
         print("    WARNING: This will execute REAL trades with REAL money!")
     print()
     
+    configure_runtime()
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,28 +1,34 @@
+import re
 import sys
 from dataclasses import dataclass, field
 from typing import List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+# Windows-safe replacements, built once at import
+_IS_WINDOWS = sys.platform.startswith('win')
+_WINDOWS_SAFE_TEXT = {
+    '→': '->',
+    '✅': '[OK]',
+    '❌': '[FAIL]',
+    '🔁': '[RETRY]',
+    '💰': '$',
+    '📊': '[STATS]',
+    '🎯': '[TARGET]',
+    '⚠️': '[WARN]',
+    '🚀': '[START]',
+    '🔺': '[BOT]'
+}
+# Single-codepoint symbols go through str.translate, multi-codepoint ones (e.g. '⚠️') through one regex sweep
+_SINGLE_CHAR_TABLE = str.maketrans({k: v for k, v in _WINDOWS_SAFE_TEXT.items() if len(k) == 1})
+_MULTI_CHAR_MAP = {k: v for k, v in _WINDOWS_SAFE_TEXT.items() if len(k) > 1}
+_MULTI_CHAR_RE = re.compile('|'.join(map(re.escape, _MULTI_CHAR_MAP)))
+
 def safe_unicode_text(text: str) -> str:
     """Convert Unicode symbols to Windows-safe equivalents."""
-    if sys.platform.startswith('win'):
-        # Replace Unicode symbols with ASCII equivalents for Windows
-        replacements = {
-            '→': '->',
-            '✅': '[OK]',
-            '❌': '[FAIL]',
-            '🔁': '[RETRY]',
-            '💰': '$',
-            '📊': '[STATS]',
-            '🎯': '[TARGET]',
-            '⚠️': '[WARN]',
-            '🚀': '[START]',
-            '🔺': '[BOT]'
-        }
-        for unicode_char, ascii_equiv in replacements.items():
-            text = text.replace(unicode_char, ascii_equiv)
-    return text
+    if not _IS_WINDOWS:
+        return text
+    return _MULTI_CHAR_RE.sub(lambda m: _MULTI_CHAR_MAP[m.group(0)], text.translate(_SINGLE_CHAR_TABLE))
 
 class OpportunityStatus(Enum):
     DETECTED = "detected"
@@ -83,6 +89,7 @@ class ArbitrageOpportunity:
     
     # Add triangle_path as a mutable field instead of property
     _triangle_path: str = ""
+    _triangle_path_list: List[str] = field(default_factory=list, repr=False)
     
     @property
     def triangle_path(self) -> str:
@@ -96,6 +103,14 @@ class ArbitrageOpportunity:
     def triangle_path(self, value: str) -> None:
         """Set the triangle path."""
         self._triangle_path = value
+        self._triangle_path_list = []
+    
+    @property
+    def triangle_path_list(self) -> List[str]:
+        """Return the triangle path split into currencies, computed once per path."""
+        if not self._triangle_path_list:
+            self._triangle_path_list = self.triangle_path.split(' → ')
+        return self._triangle_path_list
     
     def __post_init__(self):
         """Calculate derived values after initialization."""
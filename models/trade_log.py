@@ -1,28 +1,11 @@
-import sys
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 
-def safe_unicode_text(text: str) -> str:
-    """Convert Unicode symbols to Windows-safe equivalents."""
-    if sys.platform.startswith('win'):
-        # Replace Unicode symbols with ASCII equivalents for Windows
-        replacements = {
-            '→': '->',
-            '✅': '[OK]',
-            '❌': '[FAIL]',
-            '🔁': '[RETRY]',
-            '💰': '$',
-            '📊': '[STATS]',
-            '🎯': '[TARGET]',
-            '⚠️': '[WARN]',
-            '🚀': '[START]',
-            '🔺': '[BOT]'
-        }
-        for unicode_char, ascii_equiv in replacements.items():
-            text = text.replace(unicode_char, ascii_equiv)
-    return text
+from models.arbitrage_opportunity import safe_unicode_text
+from utils.compat import DATACLASS_SLOTS
 
 class TradeStatus(Enum):
     SUCCESS = "success"
@@ -33,7 +16,7 @@ class TradeDirection(Enum):
     BUY = "buy"
     SELL = "sell"
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TradeStepLog:
     """Detailed log for each step in a triangular arbitrage trade."""
     step_number: int
@@ -65,7 +48,7 @@ class TradeStepLog:
             'slippage_percentage': self.slippage_percentage
         }
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TradeLog:
     """Comprehensive log for a complete triangular arbitrage trade."""
     trade_id: str
@@ -103,8 +86,10 @@ class TradeLog:
     def __post_init__(self):
         """Calculate derived values."""
         if self.final_amount > 0 and self.initial_amount > 0:
-            self.actual_profit_amount = self.final_amount - self.initial_amount
-            self.actual_profit_percentage = (self.actual_profit_amount / self.initial_amount) * 100
+            initial = Decimal(str(self.initial_amount))
+            profit = Decimal(str(self.final_amount)) - initial
+            self.actual_profit_amount = float(profit)
+            self.actual_profit_percentage = float(profit / initial * 100)
             self.net_pnl = self.actual_profit_amount - self.total_fees_paid - self.total_slippage
     
     @property
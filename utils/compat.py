@@ -0,0 +1,20 @@
+"""
+Small version/platform shims shared across the bot.
+"""
+
+import sys
+
+# Slotted dataclasses drop the per-instance __dict__ (dataclass slots need Python 3.10+)
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def install_uvloop() -> bool:
+    """Switch asyncio to the libuv-backed uvloop policy when it is installed (Linux/macOS)."""
+    if sys.platform == 'win32':
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
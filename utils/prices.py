@@ -0,0 +1,23 @@
+"""
+Validation of price fields coming off exchange feeds.
+"""
+
+import math
+import re
+from typing import Any
+
+# Plain decimal or exponent notation, no sign: what exchanges send for a price
+PRICE_RE = re.compile(r'\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?')
+
+
+def parse_price(value: Any) -> float:
+    """Price from a feed field, or NaN if it is not a number.
+
+    Validated explicitly rather than via try/except: malformed ticks are routine on
+    a busy stream and raising per bad field is far slower than rejecting it.
+    """
+    if isinstance(value, str):
+        return float(value) if PRICE_RE.fullmatch(value) else math.nan
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan